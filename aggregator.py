@@ -0,0 +1,124 @@
+"""
+Multi-file coverage aggregation.
+
+Parses many drcov logs in a process pool and merges their coverage into a
+single aggregate, with the union of the covered blocks and summed hit counts
+for every module.
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from coverage_set import ModuleCoverage, merge_coverage, module_coverages
+from drcov import DrcovParser
+
+
+def summarize_file(filepath: str) -> List[ModuleCoverage]:
+    """
+    Parse a drcov log into per-module coverage summaries.
+
+    This runs in the worker processes, so it only sends compact offset,
+    count and size arrays back to the parent rather than pickled block
+    objects.
+    """
+    return module_coverages(DrcovParser(filepath, mmap=True))
+
+
+def map_logs(fn: Callable[[str], Any], filepaths: Iterable[str], max_workers: Optional[int] = None,
+             chunksize: int = 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Apply a function to many drcov logs in a process pool.
+
+    A log failing to process doesn't stop the others: the exception it
+    raised is yielded in place of its result.
+
+    Args:
+        fn: Picklable function taking a log path (eg. a module-level function
+            or a functools.partial of one)
+        filepaths: drcov log paths
+        max_workers: Number of worker processes, 0 to run in-process
+        chunksize: Number of files handed to a worker at once
+
+    Yields:
+        (filepath, result or exception) pairs, in input order
+    """
+    filepaths = list(filepaths)
+    safe_fn = partial(_call_safe, fn)
+
+    if max_workers == 0:
+        for filepath in filepaths:
+            yield filepath, safe_fn(filepath)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from zip(filepaths, executor.map(safe_fn, filepaths, chunksize=chunksize))
+
+
+class CoverageAggregator(object):
+    """
+    Parse many drcov logs in parallel and merge their coverage.
+
+    Modules are matched across logs by (path, checksum), so differing module
+    ids and load addresses between runs don't matter.
+    """
+
+    # pending per-module summaries are merged once this many have piled up, to
+    # bound memory when aggregating tens of thousands of logs
+    MERGE_THRESHOLD = 256
+
+    def __init__(self, files: Union[str, Iterable[str]], max_workers: Optional[int] = None,
+                 chunksize: int = 16):
+        """
+        Args:
+            files: Glob pattern (recursive '**' supported) or list of file paths
+            max_workers: Number of worker processes, 0 to parse in-process
+            chunksize: Number of files handed to a worker at once
+        """
+        if isinstance(files, str):
+            files = sorted(glob.glob(files, recursive=True))
+        self.files = [os.fspath(f) for f in files]
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+
+        self.modules: Dict[Tuple[str, int], ModuleCoverage] = {}
+        self.errors: Dict[str, str] = {}
+        self.file_count = 0
+
+    def run(self) -> Dict[Tuple[str, int], ModuleCoverage]:
+        """
+        Parse all files and merge their coverage.
+
+        Files failing to parse are skipped and recorded in 'errors'.
+
+        Returns:
+            Aggregate coverage, keyed by module (path, checksum)
+        """
+        pending = {}
+
+        for filepath, summaries in map_logs(summarize_file, self.files, self.max_workers, self.chunksize):
+            if isinstance(summaries, Exception):
+                self.errors[filepath] = str(summaries)
+                continue
+
+            self.file_count += 1
+            for summary in summaries:
+                entry = pending.setdefault(summary.key, [])
+                entry.append(summary)
+
+                if len(entry) >= self.MERGE_THRESHOLD:
+                    entry[:] = [merge_coverage(entry)]
+
+        for key, entry in pending.items():
+            self.modules[key] = merge_coverage(entry)
+        return self.modules
+
+
+def _call_safe(fn, filepath: str):
+    """fn(filepath), returning the exception instead of raising it."""
+    try:
+        return fn(filepath)
+    except Exception as e:
+        return e
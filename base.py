@@ -16,7 +16,7 @@ class CoverageParser(ABC):
     
     All coverage format parsers (DrCov, gcov, etc.) must inherit from this class
     and implement the required abstract methods. This ensures a consistent interface
-    that the CoverageManager can use regardless of the underlying format.
+    that the CoverageAggregator can use regardless of the underlying format.
     """
     
     def __init__(self, filepath: Optional[str] = None, data: Optional[bytes] = None):
@@ -115,7 +115,7 @@ class ParsedModule:
     """
     
     def __init__(self, id: int, filename: str, base: int, end: int, size: int, 
-                 checksum: int = 0, path: str = "", entry: int = 0):
+                 checksum: int = 0, path: str = "", entry: int = 0, timestamp: int = 0):
         self.id = id
         self.filename = filename
         self.base = base
@@ -124,6 +124,7 @@ class ParsedModule:
         self.checksum = checksum
         self.path = path
         self.entry = entry
+        self.timestamp = timestamp
 
     @property
     def start(self):
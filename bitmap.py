@@ -0,0 +1,233 @@
+"""
+Compact per-module coverage sets.
+
+A ModuleBitmap records which block offsets of a module were covered. Dense
+coverage is stored as a packed bit array with one bit per byte offset of
+the module, sparse coverage as a sorted array of offsets, whichever is
+smaller. All set operations are vectorized NumPy operations.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+# np.bitwise_count is only available from NumPy 2.0 onwards
+_bitwise_count = getattr(np, "bitwise_count", None)
+
+
+class ModuleBitmap(object):
+    """
+    Set of covered block offsets of one module.
+
+    The representation is picked automatically: a sorted uint32 offset array
+    (4 bytes per block) while that is smaller than the packed bitmap
+    (size / 8 bytes), the bitmap otherwise.
+    """
+
+    __slots__ = ("size", "bits", "offsets_array")
+
+    def __init__(self, size: int, bits: np.ndarray = None, offsets: np.ndarray = None):
+        """
+        Use from_offsets() rather than calling this directly.
+
+        Args:
+            size: Module size in bytes (number of addressable offsets)
+            bits: Packed little-endian bitmap, for the dense representation
+            offsets: Sorted unique offsets, for the sparse representation
+        """
+        self.size = size
+        self.bits = bits
+        self.offsets_array = offsets
+
+    @classmethod
+    def from_offsets(cls, offsets, size: int = 0, dense: bool = None) -> "ModuleBitmap":
+        """
+        Build a bitmap from covered block offsets.
+
+        Args:
+            offsets: Covered offsets (any order, duplicates allowed)
+            size: Module size; grown to fit the largest offset if needed
+            dense: Force the dense (True) or sparse (False) representation
+        """
+        offsets = np.unique(np.asarray(offsets, dtype=np.uint32))
+        if len(offsets):
+            size = max(size, int(offsets[-1]) + 1)
+        return cls(size, offsets=offsets)._compact(dense)
+
+    @property
+    def is_dense(self) -> bool:
+        return self.bits is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the coverage data."""
+        return self.bits.nbytes if self.is_dense else self.offsets_array.nbytes
+
+    def offsets(self) -> np.ndarray:
+        """Return the covered offsets as a sorted uint32 array."""
+        if not self.is_dense:
+            return self.offsets_array
+        unpacked = np.unpackbits(self.bits, bitorder="little")
+        return np.flatnonzero(unpacked).astype(np.uint32)
+
+    def popcount(self) -> int:
+        """Return the number of covered offsets."""
+        if not self.is_dense:
+            return len(self.offsets_array)
+        if _bitwise_count is not None:
+            return int(_bitwise_count(self.bits).sum(dtype=np.int64))
+        return int(np.unpackbits(self.bits).sum(dtype=np.int64))
+
+    def __len__(self):
+        return self.popcount()
+
+    def __contains__(self, offset):
+        if offset < 0 or offset >= self.size:
+            return False
+        if self.is_dense:
+            return bool(self.bits[offset >> 3] & (1 << (offset & 7)))
+        index = np.searchsorted(self.offsets_array, offset)
+        return index < len(self.offsets_array) and self.offsets_array[index] == offset
+
+    def contains(self, offsets) -> np.ndarray:
+        """Return a boolean mask telling which of the offsets are covered."""
+        offsets = np.asarray(offsets, dtype=np.uint32)
+        if not self.is_dense:
+            index = np.searchsorted(self.offsets_array, offsets)
+            found = index < len(self.offsets_array)
+            found[found] = self.offsets_array[index[found]] == offsets[found]
+            return found
+
+        found = offsets < self.size
+        inside = offsets[found]
+        found[found] = (self.bits[inside >> 3] >> (inside & 7).astype(np.uint8)) & 1 != 0
+        return found
+
+    def update(self, offsets) -> None:
+        """
+        Add covered offsets in place.
+
+        The bitmap grows to fit offsets past its size, and switches to the
+        dense representation once that is smaller.
+        """
+        offsets = np.asarray(offsets, dtype=np.uint32)
+        if not len(offsets):
+            return
+        size = max(self.size, int(offsets.max()) + 1)
+
+        if not self.is_dense:
+            self.size, self.offsets_array = size, np.union1d(self.offsets_array, offsets)
+            if len(self.offsets_array) * 4 > (size + 7) // 8:
+                self.bits, self.offsets_array = self._dense_bits((size + 7) // 8), None
+            return
+
+        if size > self.size:
+            self.size, self.bits = size, self._dense_bits((size + 7) // 8)
+        np.bitwise_or.at(self.bits, offsets >> 3, (1 << (offsets & 7)).astype(np.uint8))
+
+    def __eq__(self, other):
+        if not isinstance(other, ModuleBitmap):
+            return NotImplemented
+        return np.array_equal(self.offsets(), other.offsets())
+
+    def __repr__(self):
+        kind = "dense" if self.is_dense else "sparse"
+        return f"ModuleBitmap(size=0x{self.size:x}, blocks={self.popcount()}, {kind})"
+
+    # --------------------------------------------------------------------------
+    # Set Operations
+    # --------------------------------------------------------------------------
+
+    def union(self, other: "ModuleBitmap") -> "ModuleBitmap":
+        """Offsets covered by either bitmap."""
+        return self._combine(other, np.union1d, np.bitwise_or)
+
+    def intersection(self, other: "ModuleBitmap") -> "ModuleBitmap":
+        """Offsets covered by both bitmaps."""
+        return self._combine(other, _intersect_sorted, np.bitwise_and)
+
+    def difference(self, other: "ModuleBitmap") -> "ModuleBitmap":
+        """Offsets covered by this bitmap but not by the other."""
+        return self._combine(other, _difference_sorted, lambda a, b: a & ~b)
+
+    def symmetric_difference(self, other: "ModuleBitmap") -> "ModuleBitmap":
+        """Offsets covered by exactly one of the bitmaps."""
+        return self._combine(other, _symmetric_difference_sorted, np.bitwise_xor)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+
+    # --------------------------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------------------------
+
+    def _combine(self, other, sparse_op, dense_op) -> "ModuleBitmap":
+        """Apply a set operation, on offset arrays or bitmaps as appropriate."""
+        size = max(self.size, other.size)
+
+        if not self.is_dense and not other.is_dense:
+            result = ModuleBitmap(size, offsets=sparse_op(self.offsets_array, other.offsets_array))
+        else:
+            nbytes = (size + 7) // 8
+            result = ModuleBitmap(size, bits=dense_op(self._dense_bits(nbytes), other._dense_bits(nbytes)))
+
+        return result._compact()
+
+    def _dense_bits(self, nbytes: int) -> np.ndarray:
+        """Return the packed bitmap, padded to nbytes."""
+        if self.is_dense:
+            if len(self.bits) == nbytes:
+                return self.bits
+            bits = np.zeros(nbytes, dtype=np.uint8)
+            bits[:len(self.bits)] = self.bits
+            return bits
+
+        bits = np.zeros(nbytes, dtype=np.uint8)
+        offsets = self.offsets_array
+        np.bitwise_or.at(bits, offsets >> 3, (1 << (offsets & 7)).astype(np.uint8))
+        return bits
+
+    def _compact(self, dense: bool = None) -> "ModuleBitmap":
+        """Switch to the smaller (or the requested) representation."""
+        dense_bytes = (self.size + 7) // 8
+        count = self.popcount()
+        if dense is None:
+            dense = count * 4 > dense_bytes
+
+        if dense and not self.is_dense:
+            return ModuleBitmap(self.size, bits=self._dense_bits(dense_bytes))
+        if not dense and self.is_dense:
+            return ModuleBitmap(self.size, offsets=self.offsets())
+        return self
+
+
+def _intersect_sorted(a, b):
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def _difference_sorted(a, b):
+    return np.setdiff1d(a, b, assume_unique=True)
+
+
+def _symmetric_difference_sorted(a, b):
+    return np.setxor1d(a, b, assume_unique=True)
+
+
+def module_bitmaps(parser, dense: bool = None) -> Dict[int, ModuleBitmap]:
+    """
+    Build the coverage bitmap of every covered module of a parsed log.
+
+    Bitmaps are sized from the module sizes of the module table.
+
+    Returns:
+        Dictionary of mod_id -> ModuleBitmap
+    """
+    bitmaps = {}
+    for mod_id, hit_count_map in parser.bb_hit_count_map.items():
+        module = parser.get_module_by_id(mod_id)
+        size = module.size if module else 0
+        bitmaps[mod_id] = ModuleBitmap.from_offsets(hit_count_map.offsets, size, dense)
+    return bitmaps
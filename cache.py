@@ -0,0 +1,291 @@
+"""
+On-disk cache of parsed drcov coverage.
+
+Each parsed log is stored as a compact binary sidecar holding the module
+table, the raw basic block table and the hit count and block size arrays.
+Sidecars are memory-mapped on a hit, so reopening a log that was parsed
+before costs next to nothing. (The per-module block index is left out, the
+parser builds it on demand.)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from drcov import DrcovBasicBlock, DrcovHitCountMap, DrcovModule
+
+
+# sidecar layout: magic, u64 JSON header length, JSON header, aligned arrays
+CACHE_MAGIC = b"DRCVCCH1"
+CACHE_SUFFIX = ".drcovcache"
+CACHE_ALIGNMENT = 64
+
+
+class CoverageCache(object):
+    """
+    Directory of parsed-coverage sidecars with an LRU size budget.
+
+    Entries are keyed by the absolute path, size and mtime of the log, plus a
+    hash of its contents when hash_content is set. Least recently used
+    entries are evicted once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 4 << 30, hash_content: bool = False):
+        """
+        Args:
+            directory: Directory holding the sidecars (created if missing)
+            max_bytes: Size budget for all sidecars together
+            hash_content: Also key entries by a BLAKE2 hash of the log contents
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+        os.makedirs(directory, exist_ok=True)
+
+    # --------------------------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------------------------
+
+    def make_key(self, filepath) -> list:
+        """
+        Build the cache key of the given log.
+
+        With hash_content set this reads the whole log, so callers doing a
+        load() then a store() should build the key once and pass it to both.
+        """
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        key = [filepath, stat.st_size, stat.st_mtime_ns]
+
+        if self.hash_content:
+            digest = hashlib.blake2b()
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            key.append(digest.hexdigest())
+
+        return key
+
+    def load(self, parser, key=None) -> bool:
+        """
+        Populate the given DrcovParser from the cache.
+
+        Args:
+            parser: DrcovParser to populate
+            key: Cache key of the parser's log, from make_key() (built if None)
+
+        Returns:
+            True on a cache hit, False otherwise
+        """
+        if key is None:
+            key = self.make_key(parser.filepath)
+        sidecar = self._sidecar_path(key)
+
+        try:
+            with open(sidecar, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return False
+
+        try:
+            header = self._read_header(mapped)
+            hit = header["key"] == key
+            if hit:
+                self._restore(parser, header, mapped)
+        except (KeyError, ValueError, struct.error):
+            # corrupt or outdated entry, drop it
+            self._remove(sidecar)
+            hit = False
+
+        if not hit:
+            # nothing references the mapping after a miss
+            mapped.close()
+            return False
+
+        # bump the entry to most recently used
+        os.utime(sidecar)
+        return True
+
+    def store(self, parser, key=None) -> None:
+        """
+        Write a sidecar for the given (fully parsed) DrcovParser.
+
+        Args:
+            parser: Parsed DrcovParser to cache
+            key: Cache key of the parser's log, from make_key() (built if None)
+        """
+        if key is None:
+            key = self.make_key(parser.filepath)
+
+        try:
+            self._write(self._sidecar_path(key), key, parser)
+            self.evict()
+        except OSError:
+            # caching is best effort, a full or read-only disk is not an error
+            pass
+
+    def evict(self) -> None:
+        """Remove the least recently used sidecars until under the size budget."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every sidecar from the cache directory."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_SUFFIX):
+                self._remove(entry.path)
+
+    # --------------------------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------------------------
+
+    def _sidecar_path(self, key) -> str:
+        """Return the sidecar path for the given cache key."""
+        name = hashlib.sha256(json.dumps(key).encode()).hexdigest()[:32]
+        return os.path.join(self.directory, name + CACHE_SUFFIX)
+
+    def _write(self, sidecar, key, parser) -> None:
+        """Serialize the parser state into a sidecar file."""
+        hit_modules = sorted(parser.bb_hit_count_map.items())
+        hit_offsets = [np.asarray(hit_map.offsets, dtype=np.uint32) for _, hit_map in hit_modules]
+        hit_counts = [np.asarray(hit_map.counts, dtype=np.int64) for _, hit_map in hit_modules]
+        hit_sizes = [np.asarray(hit_map.sizes, dtype=np.uint16) for _, hit_map in hit_modules]
+        hit_ranges = []
+        start = 0
+        for (mod_id, _), offsets in zip(hit_modules, hit_offsets):
+            hit_ranges.append([mod_id, start, start + len(offsets)])
+            start += len(offsets)
+
+        arrays = {
+            "blocks": np.frombuffer(parser._raw_basic_blocks, dtype=np.uint8),
+            "hit_offsets": np.concatenate(hit_offsets) if hit_offsets else np.empty(0, np.uint32),
+            "hit_counts": np.concatenate(hit_counts) if hit_counts else np.empty(0, np.int64),
+            "hit_sizes": np.concatenate(hit_sizes) if hit_sizes else np.empty(0, np.uint16),
+        }
+
+        header = {
+            "key": key,
+            "version": parser.version,
+            "flavor": parser.flavor.decode("latin-1"),
+            "module_table_count": parser.module_table_count,
+            "module_table_version": parser.module_table_version,
+            "module_table_columns": parser.module_table_columns,
+            "modules": [vars(module) for module in parser._raw_modules],
+            "bb_table_count": parser.bb_table_count,
+            "bb_table_is_binary": parser.bb_table_is_binary,
+            "hit_ranges": hit_ranges,
+            "arrays": {},
+        }
+
+        # lay the arrays out at aligned offsets following the header. the
+        # header size depends on those offsets, so settle it iteratively
+        header_size = 0
+        while True:
+            position = header_size
+            for name, values in arrays.items():
+                position = _align(position)
+                header["arrays"][name] = [position, values.dtype.str, len(values)]
+                position += values.nbytes
+            encoded = json.dumps(header).encode()
+            required = _align(len(CACHE_MAGIC) + 8 + len(encoded))
+            if required <= header_size:
+                break
+            header_size = required
+
+        # write to a temporary file first so readers never see partial entries
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(CACHE_MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+                for name, values in arrays.items():
+                    f.write(b"\x00" * (header["arrays"][name][0] - f.tell()))
+                    f.write(values.tobytes())
+            os.replace(temporary, sidecar)
+        except BaseException:
+            self._remove(temporary)
+            raise
+
+    @staticmethod
+    def _read_header(mapped) -> dict:
+        """Read and validate the JSON header of a mapped sidecar."""
+        if mapped[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            raise ValueError("Not a coverage cache sidecar")
+        start = len(CACHE_MAGIC) + 8
+        length, = struct.unpack_from("<Q", mapped, len(CACHE_MAGIC))
+        return json.loads(mapped[start:start + length])
+
+    @staticmethod
+    def _restore(parser, header, mapped) -> None:
+        """
+        Restore the parser state from a mapped sidecar (zero-copy).
+
+        Everything is read from the sidecar before the parser is touched, so
+        a corrupt entry leaves the parser as it was.
+        """
+        arrays = {}
+        for name, (position, dtype, length) in header["arrays"].items():
+            arrays[name] = np.frombuffer(mapped, dtype=np.dtype(dtype), count=length, offset=position)
+
+        raw_modules = []
+        for fields in header["modules"]:
+            module = DrcovModule.__new__(DrcovModule)
+            module.__dict__.update(fields)
+            raw_modules.append(module)
+
+        bb_table_count = header["bb_table_count"]
+        blocks_position = header["arrays"]["blocks"][0]
+        raw_basic_blocks = (DrcovBasicBlock * bb_table_count).from_buffer(mapped, blocks_position)
+
+        hit_offsets, hit_counts, hit_sizes = arrays["hit_offsets"], arrays["hit_counts"], arrays["hit_sizes"]
+        hit_count_map = {
+            mod_id: DrcovHitCountMap(hit_offsets[start:end], hit_counts[start:end], hit_sizes[start:end])
+            for mod_id, start, end in header["hit_ranges"]
+        }
+
+        parser.version = header["version"]
+        parser.flavor = header["flavor"].encode("latin-1")
+        parser.module_table_count = header["module_table_count"]
+        parser.module_table_version = header["module_table_version"]
+        parser.module_table_columns = header["module_table_columns"]
+        parser._raw_modules = raw_modules
+
+        parser.bb_table_count = bb_table_count
+        parser.bb_table_is_binary = header["bb_table_is_binary"]
+        parser._raw_basic_blocks = raw_basic_blocks
+        parser._bb_table = None
+        parser._bb_module_order = None
+        parser._bb_module_ranges = None
+        parser.bb_hit_count_map = hit_count_map
+
+        # the arrays above are views, keep the mapping alive with the parser
+        parser._mmap = mapped
+
+        # rebuild the parsed modules and the module/address indexes
+        parser._convert_to_parsed_objects()
+
+    @staticmethod
+    def _remove(path) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _align(position: int) -> int:
+    """Round position up to the next array alignment boundary."""
+    return (position + CACHE_ALIGNMENT - 1) // CACHE_ALIGNMENT * CACHE_ALIGNMENT
@@ -0,0 +1,245 @@
+"""
+Set algebra over coverage.
+
+A CoverageSet holds the per-module coverage of one or more runs as sorted
+offset, hit count and block size arrays. Modules are matched across runs by
+path, checksum or filename rather than by their run-specific ids, so sets
+built from different logs can be combined with union, intersection,
+difference and symmetric difference.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+
+# ways of identifying the same module across runs
+MATCH_KEYS: Dict[str, Callable[[Any], Any]] = {
+    "path": lambda module: module.path,
+    "checksum": lambda module: (module.checksum, module.size),  # Windows logs only
+    "filename": lambda module: module.filename.lower(),
+}
+
+
+def module_key(module) -> Tuple[str, int]:
+    """
+    Return the run-independent identity of a module, (path, checksum).
+
+    Every cross-run structure (registry, aggregator, store, sketches, ...)
+    matches modules by this key. The size is left out on purpose: segments
+    of a module listed separately in the module table share their key.
+    """
+    return (module.path, module.checksum)
+
+
+class ModuleCoverage(object):
+    """
+    Compact coverage summary for one module.
+
+    Coverage is stored as parallel arrays sorted by offset: 'offsets' holds
+    the unique covered block offsets, 'counts' their hit counts and 'sizes'
+    the block sizes. Summaries built by module_coverages() also remember the
+    module's id in the parsed log as 'mod_id' (-1 otherwise).
+    """
+
+    def __init__(self, path: str, filename: str, checksum: int, size: int,
+                 offsets: np.ndarray, counts: np.ndarray, sizes: np.ndarray, mod_id: int = -1):
+        self.mod_id = mod_id
+        self.path = path
+        self.filename = filename
+        self.checksum = checksum
+        self.size = size
+        self.offsets = offsets
+        self.counts = counts
+        self.sizes = sizes
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        """Run-independent identity of the module, see module_key()."""
+        return module_key(self)
+
+    @property
+    def block_count(self) -> int:
+        """Number of unique blocks covered."""
+        return len(self.offsets)
+
+    @property
+    def hit_count(self) -> int:
+        """Total number of block hits."""
+        return int(self.counts.sum())
+
+    def with_blocks(self, offsets: np.ndarray, counts: np.ndarray, sizes: np.ndarray) -> "ModuleCoverage":
+        """Return a copy of this module summary holding other blocks."""
+        return ModuleCoverage(self.path, self.filename, self.checksum, self.size, offsets, counts, sizes,
+                              mod_id=self.mod_id)
+
+    def __repr__(self):
+        return f"ModuleCoverage(filename='{self.filename}', blocks={self.block_count}, hits={self.hit_count})"
+
+
+def module_coverages(parser) -> List[ModuleCoverage]:
+    """Return the coverage summary of every covered module of a parsed log."""
+    coverages = []
+    for module in parser.get_modules():
+        hit_count_map = parser.bb_hit_count_map.get(module.id)
+        if not hit_count_map:
+            continue
+        coverages.append(ModuleCoverage(
+            mod_id=module.id,
+            path=module.path,
+            filename=module.filename,
+            checksum=module.checksum,
+            size=module.size,
+            offsets=np.asarray(hit_count_map.offsets, dtype=np.uint32),
+            counts=np.asarray(hit_count_map.counts, dtype=np.int64),
+            sizes=np.asarray(hit_count_map.sizes, dtype=np.uint16),
+        ))
+    return coverages
+
+
+def merge_coverage(coverages: List[ModuleCoverage]) -> ModuleCoverage:
+    """
+    Merge several coverage summaries of the same module.
+
+    Returns the union of the offsets, with summed hit counts and the largest
+    size seen for each block.
+    """
+    if len(coverages) == 1:
+        return coverages[0]
+
+    offsets, inverse = np.unique(np.concatenate([c.offsets for c in coverages]), return_inverse=True)
+    counts, sizes = _reduce_blocks(len(offsets), inverse, coverages)
+    return coverages[0].with_blocks(offsets, counts, sizes)
+
+
+def _reduce_blocks(count, inverse, coverages):
+    """Sum the hit counts and take the largest sizes of blocks sharing an offset."""
+    counts = np.zeros(count, dtype=np.int64)
+    np.add.at(counts, inverse, np.concatenate([c.counts for c in coverages]))
+    sizes = np.zeros(count, dtype=np.uint16)
+    np.maximum.at(sizes, inverse, np.concatenate([c.sizes for c in coverages]))
+    return counts, sizes
+
+
+def _combine(left: ModuleCoverage, right: ModuleCoverage, keep) -> ModuleCoverage:
+    """
+    Combine two coverage summaries of the same module.
+
+    keep(in_left, in_right) selects the offsets to retain from their union.
+    Retained blocks keep the hit counts summed over both sides.
+    """
+    offsets, inverse = np.unique(np.concatenate((left.offsets, right.offsets)), return_inverse=True)
+    in_left = np.zeros(len(offsets), dtype=bool)
+    in_left[inverse[:len(left.offsets)]] = True
+    in_right = np.zeros(len(offsets), dtype=bool)
+    in_right[inverse[len(left.offsets):]] = True
+
+    counts, sizes = _reduce_blocks(len(offsets), inverse, [left, right])
+    retained = keep(in_left, in_right)
+    return left.with_blocks(offsets[retained], counts[retained], sizes[retained])
+
+
+class CoverageSet(object):
+    """
+    Coverage of one or more runs, keyed by run-independent module identity.
+
+    Set operations match modules by the key selected with 'match' ('path',
+    'checksum' or 'filename') and return new CoverageSets. Either operand
+    may also be a parsed DrcovParser.
+    """
+
+    def __init__(self, modules: Dict[Any, ModuleCoverage], match: str = "path"):
+        if match not in MATCH_KEYS:
+            raise ValueError("Unknown module match '%s'" % match)
+        self.modules = modules
+        self.match = match
+
+    @classmethod
+    def from_parser(cls, parser, match: str = "path") -> "CoverageSet":
+        """Build the coverage set of a parsed log."""
+        if match not in MATCH_KEYS:
+            raise ValueError("Unknown module match '%s'" % match)
+
+        # modules sharing a key within one log (eg. segments) are merged
+        grouped = {}
+        for coverage in module_coverages(parser):
+            grouped.setdefault(MATCH_KEYS[match](coverage), []).append(coverage)
+        return cls({key: merge_coverage(group) for key, group in grouped.items()}, match)
+
+    @property
+    def block_count(self) -> int:
+        """Number of unique blocks covered, over all modules."""
+        return sum(coverage.block_count for coverage in self.modules.values())
+
+    @property
+    def hit_count(self) -> int:
+        """Total number of block hits, over all modules."""
+        return sum(coverage.hit_count for coverage in self.modules.values())
+
+    def __getitem__(self, key) -> ModuleCoverage:
+        return self.modules[key]
+
+    def __contains__(self, key):
+        return key in self.modules
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.modules)
+
+    def __len__(self):
+        return len(self.modules)
+
+    def __repr__(self):
+        return f"CoverageSet(modules={len(self)}, blocks={self.block_count}, match='{self.match}')"
+
+    # --------------------------------------------------------------------------
+    # Set Operations
+    # --------------------------------------------------------------------------
+
+    def union(self, other) -> "CoverageSet":
+        """Blocks covered by either side."""
+        return self._apply(other, lambda a, b: a | b, keep_left=True, keep_right=True)
+
+    def intersection(self, other) -> "CoverageSet":
+        """Blocks covered by both sides."""
+        return self._apply(other, lambda a, b: a & b, keep_left=False, keep_right=False)
+
+    def difference(self, other) -> "CoverageSet":
+        """Blocks covered by this side but not by the other."""
+        return self._apply(other, lambda a, b: a & ~b, keep_left=True, keep_right=False)
+
+    def symmetric_difference(self, other) -> "CoverageSet":
+        """Blocks covered by exactly one side."""
+        return self._apply(other, lambda a, b: a ^ b, keep_left=True, keep_right=True)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+
+    def _apply(self, other, keep, keep_left: bool, keep_right: bool) -> "CoverageSet":
+        """
+        Apply a set operation module by module.
+
+        keep_left/keep_right tell whether modules only present on that side
+        are carried over unchanged.
+        """
+        if not isinstance(other, CoverageSet):
+            other = CoverageSet.from_parser(other, self.match)
+        elif other.match != self.match:
+            raise ValueError("Can't combine coverage sets matched by '%s' and '%s'" % (self.match, other.match))
+
+        modules = {}
+        for key, coverage in self.modules.items():
+            if key in other.modules:
+                combined = _combine(coverage, other.modules[key], keep)
+                if combined.block_count:
+                    modules[key] = combined
+            elif keep_left:
+                modules[key] = coverage
+
+        if keep_right:
+            for key, coverage in other.modules.items():
+                if key not in self.modules:
+                    modules[key] = coverage
+
+        return CoverageSet(modules, self.match)
@@ -9,12 +9,48 @@ import os
 import sys
 import struct
 import re
+import gzip
+import bz2
+import lzma
 from ctypes import *
 import io
-from typing import List, Optional
+import itertools
+import mmap
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import ItemsView, Mapping, Sequence, ValuesView
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 import argparse
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the columnar accessors need it
+    np = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:  # zstd compressed logs are only supported when available
+        zstd = None
+
+
+# magic bytes of the containers compressed drcov logs are stored in
+COMPRESSION_MAGICS = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+# binary basic block tables are read from (compressed) streams in chunks of
+# this many bytes, so no full-size intermediate copy of the table is made
+BB_READ_CHUNK_SIZE = 1 << 20
+
 from base import CoverageParser, ParsedModule, ParsedBasicBlock
+from instrumentation import NO_PHASE, ParseStats, logger
 
 
 class DrcovParser(CoverageParser):
@@ -22,8 +58,29 @@ class DrcovParser(CoverageParser):
     DrCov log parser implementing the CoverageParser interface.
     """
 
-    def __init__(self, filepath=None, data=None):
+    def __init__(self, filepath=None, data=None, mmap=False, blocks=True, cache=None, workers=None,
+                 instrument=False, trace_allocations=False):
         super().__init__(filepath, data)
+
+        # map the log into memory rather than reading it through a buffer
+        self.use_mmap = mmap
+        self._mmap = None
+
+        # when False, parsing stops after the basic block table header
+        self.parse_blocks = blocks
+
+        # optional CoverageCache holding previously parsed logs
+        self.cache = cache
+
+        # number of threads parsing large ascii bb tables (default: cpu count)
+        self.workers = workers or os.cpu_count() or 1
+
+        # opt-in per-phase parse statistics; instrument may also be a
+        # callback(parser, phase_stats) run after every phase
+        self.stats = None
+        if instrument:
+            callback = instrument if callable(instrument) else None
+            self.stats = ParseStats(callback, trace_allocations)
         
         # drcov header attributes
         self.version = 0
@@ -32,14 +89,21 @@ class DrcovParser(CoverageParser):
         # drcov module table
         self.module_table_count = 0
         self.module_table_version = 0
+        self.module_table_columns = []  # Column names, as listed in the log
         self._raw_modules = []  # Internal DrcovModule objects
         self._parsed_modules = []  # Converted ParsedModule objects
+        self._module_index = DrcovModuleIndex([])  # Name/id lookups over _parsed_modules
+        self._address_index = DrcovAddressIndex([])  # Address -> module lookups
 
         # drcov basic block data
         self.bb_table_count = 0
         self.bb_table_is_binary = True
+        self.bb_table_offset = 0  # Position of the table in the (decompressed) log
+        self._bb_table_head = b""  # First bytes of the table, read to detect its format
         self._raw_basic_blocks = []  # Internal DrcovBasicBlock ctypes array
-        self._parsed_basic_blocks = []  # Converted ParsedBasicBlock objects
+        self._bb_table = None  # NumPy view over the ctypes array, built on demand
+        self._bb_module_order = None  # Block indices grouped by module, built on demand
+        self._bb_module_ranges = None  # mod_id -> (start, end) into _bb_module_order
 
         # drcov aggregated data
         self.bb_hit_count_map = {}
@@ -51,23 +115,120 @@ class DrcovParser(CoverageParser):
         """Parse the coverage data."""
         if self._parsed:
             return
+
+        # a warm cache entry holds everything the parsing steps below produce
+        use_cache = self.cache is not None and self.filepath is not None and self.parse_blocks
+        if use_cache:
+            with self._phase("cache_load"):
+                # built once, hashing the log for both the load and the store
+                cache_key = self.cache.make_key(self.filepath)
+                cached = self.cache.load(self, cache_key)
+            if cached:
+                self._mark_parsed()
+                return
             
         if self.filepath is not None:
             self._parse_drcov_file(self.filepath)
         elif self.data is not None:
             self._parse_drcov_data(self.data)
-            
+
         # Convert internal objects to clean parsed objects
-        self._convert_to_parsed_objects()
+        with self._phase("convert"):
+            self._convert_to_parsed_objects()
         self._mark_parsed()
 
+        if use_cache:
+            with self._phase("cache_store"):
+                self.cache.store(self, cache_key)
+
     def get_modules(self) -> List[ParsedModule]:
         """Get list of modules from coverage data."""
         return self._parsed_modules
 
-    def get_basic_blocks(self) -> List[ParsedBasicBlock]:
-        """Get list of basic blocks from coverage data."""
-        return self._parsed_basic_blocks
+    def get_basic_blocks(self) -> "DrcovBasicBlockSequence":
+        """Get a lazy sequence of the basic blocks from coverage data."""
+        return DrcovBasicBlockSequence(self._raw_basic_blocks)
+
+    @classmethod
+    def iter_blocks(cls, filepath, chunk_size: int = 1 << 20):
+        """
+        Stream the basic block table of a drcov log in fixed-size chunks.
+
+        Only one chunk is held in memory at a time, so arbitrarily large logs
+        (binary or ascii tables, compressed or not) can be processed in a
+        single pass with constant memory.
+
+        Args:
+            filepath: Path to the drcov log
+            chunk_size: Maximum number of blocks per chunk
+
+        Yields:
+            DRCOV_BB_DTYPE structured arrays (DrcovBasicBlock arrays without
+            NumPy) of at most chunk_size blocks each
+        """
+        header = cls(filepath, blocks=False)
+        remaining = header.bb_table_count
+
+        with open(filepath, "rb") as raw, _open_decompressed(raw) as f:
+            # skip over the header and module table parsed above
+            _skip(f, header.bb_table_offset)
+            if not header.bb_table_is_binary:
+                f.readline()
+
+            while remaining:
+                count = min(chunk_size, remaining)
+                blocks = (DrcovBasicBlock * count)()
+
+                if header.bb_table_is_binary:
+                    if _readinto_chunked(f, blocks) != sizeof(blocks):
+                        raise ValueError("Truncated BB table")
+                else:
+                    lines = list(itertools.islice(f, count))
+                    if len(lines) < count:
+                        found = header.bb_table_count - remaining + len(lines)
+                        raise ValueError("Truncated BB table: expected %u entries, found %u"
+                                         % (header.bb_table_count, found))
+                    lines = b"".join(lines)
+                    if np is not None:
+                        _parse_bb_text_entries(lines, np.frombuffer(blocks, dtype=DRCOV_BB_DTYPE))
+                    else:
+                        _parse_bb_text_entries_slow(lines, blocks)
+
+                remaining -= count
+                yield np.frombuffer(blocks, dtype=DRCOV_BB_DTYPE) if np is not None else blocks
+
+    # --------------------------------------------------------------------------
+    # Columnar Accessors
+    # --------------------------------------------------------------------------
+
+    @property
+    def bb_table(self):
+        """
+        Basic block table as a NumPy structured array.
+
+        The array is a zero-copy view over the raw DrcovBasicBlock buffer, with
+        the fields 'offset' (uint32), 'size' (uint16) and 'mod_id' (uint16).
+        """
+        if np is None:
+            raise ImportError("numpy is required for the columnar basic block table")
+        if self._bb_table is None:
+            self._bb_table = np.frombuffer(self._raw_basic_blocks, dtype=DRCOV_BB_DTYPE)
+        return self._bb_table
+
+    @property
+    def offsets(self):
+        """Basic block offsets column (view into bb_table)."""
+        return self.bb_table["offset"]
+
+    @property
+    def sizes(self):
+        """Basic block sizes column (view into bb_table)."""
+        return self.bb_table["size"]
+
+    @property
+    def mod_ids(self):
+        """Basic block module ids column (view into bb_table)."""
+        return self.bb_table["mod_id"]
 
     def get_module(self, module_name: str, fuzzy: bool = True) -> Optional[ParsedModule]:
         """
@@ -81,12 +242,14 @@ class DrcovParser(CoverageParser):
             ParsedModule if found, None otherwise
         """
 
+        index = self._module_index
+
         # fuzzy module name lookup
         if fuzzy:
             # attempt lookup using case-insensitive filename
-            for module in self._parsed_modules:
-                if module_name.lower() in module.filename.lower():
-                    return module
+            module = index.find_substring(module_name.lower())
+            if module:
+                return module
 
             # no hits yet... let's cleave the extension from the given module
             # name (if present) and try again
@@ -94,20 +257,52 @@ class DrcovParser(CoverageParser):
                 module_name = module_name.split(".")[0]
 
             # attempt lookup using case-insensitive filename without extension
-            for module in self._parsed_modules:
-                if module_name.lower() in module.filename.lower():
-                    return module
+            return index.find_substring(module_name.lower())
 
         # strict lookup
-        else:
-            for module in self._parsed_modules:
-                if module_name == module.filename:
-                    return module
+        return index.by_filename.get(module_name)
 
-        # no matching module exists
-        return None
+    def get_module_by_id(self, mod_id: int) -> Optional[ParsedModule]:
+        """
+        Get a module by its id in the module table.
+
+        Args:
+            mod_id: Module id, as referenced by the basic blocks
+
+        Returns:
+            ParsedModule if found, None otherwise
+        """
+        return self._module_index.by_id.get(mod_id)
+
+    def module_for_address(self, address: int) -> Optional[ParsedModule]:
+        """
+        Resolve an absolute address to the module mapped at it.
+
+        When modules overlap (eg. segments contained in a larger mapping),
+        the innermost, smallest module wins.
+
+        Args:
+            address: Absolute address, eg. from a crash log
 
-    def get_blocks_by_module(self, module_name: str) -> List[ParsedBasicBlock]:
+        Returns:
+            ParsedModule if the address is mapped, None otherwise
+        """
+        return self._address_index.lookup(address)
+
+    def modules_for_addresses(self, addresses):
+        """
+        Resolve a batch of absolute addresses to module ids.
+
+        Args:
+            addresses: Sequence or NumPy array of absolute addresses
+
+        Returns:
+            NumPy int64 array (a list without NumPy) of module ids, with -1
+            for unmapped addresses
+        """
+        return self._address_index.lookup_ids(addresses)
+
+    def get_blocks_by_module(self, module_name: str) -> "DrcovBasicBlockSequence":
         """
         Extract coverage blocks pertaining to the named module.
         
@@ -115,7 +310,7 @@ class DrcovParser(CoverageParser):
             module_name: Name of the module to get blocks for
             
         Returns:
-            List of basic blocks for the specified module
+            Lazy sequence of basic blocks for the specified module
             
         Raises:
             ValueError: If module is not found
@@ -131,14 +326,21 @@ class DrcovParser(CoverageParser):
         # extract module id for speed
         mod_id = module.id
 
-        # loop through the coverage data and filter out data for only this module
-        coverage_blocks = [bb for bb in self._parsed_basic_blocks if bb.mod_id == mod_id]
+        # the blocks of each module are a contiguous run of the module index
+        order, ranges = self._get_bb_module_index()
+        start, end = ranges.get(mod_id, (0, 0))
 
-        # return the filtered coverage blocks
-        return coverage_blocks
+        # return a view over the coverage blocks of this module
+        return DrcovBasicBlockSequence(self._raw_basic_blocks, order[start:end])
 
-    def get_hit_count_map_by_module(self, module_name: str):
-        """Get hit count map for a specific module."""
+    def get_hit_count_map_by_module(self, module_name: str) -> "DrcovHitCountMap":
+        """
+        Get hit count map for a specific module.
+
+        Returns:
+            DrcovHitCountMap (offset -> hit count) exposing the sorted
+            'offsets' and 'counts' arrays of the module
+        """
         # locate the coverage that matches the given module_name
         module = self.get_module(module_name)
 
@@ -149,11 +351,8 @@ class DrcovParser(CoverageParser):
         # extract module id for speed
         mod_id = module.id
 
-        # loop through the coverage data and filter out data for only this module
-        bb_hit_count_map = [(bb_start, self.bb_hit_count_map[mod_id][bb_start]) for bb_start in self.bb_hit_count_map[mod_id]]
-
-        # return the filtered coverage blocks
-        return bb_hit_count_map
+        # modules without any coverage simply have an empty map
+        return self.bb_hit_count_map.get(mod_id) or DrcovHitCountMap.empty()
 
     # --------------------------------------------------------------------------
     # Parsing Routines - Top Level
@@ -161,20 +360,59 @@ class DrcovParser(CoverageParser):
 
     def _parse_drcov_file(self, filepath):
         """Parse drcov coverage from the given log file."""
+        if self.use_mmap:
+            return self._parse_drcov_mmap(filepath)
+
         with open(filepath, "rb") as f:
-            self._parse_drcov_header(f)
-            self._parse_module_table(f)
-            self._parse_bb_table(f)
-            self._generate_bb_hit_count_map()
+            self._parse_drcov_stream(f)
+
+    def _parse_drcov_mmap(self, filepath):
+        """Parse drcov coverage from a memory mapping of the given log file."""
+        # ACCESS_COPY gives us a writable (copy-on-write) mapping, which ctypes
+        # needs to build the basic block array on top of it without a copy.
+        # The mapping stays alive for as long as the parser references it.
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        # compressed logs can't be used in place, stream them instead
+        if _detect_compression(self._mmap[:8]):
+            self._mmap.close()
+            self._mmap = None
+            with open(filepath, "rb") as f:
+                return self._parse_drcov_stream(f)
+
+        self._parse_drcov_sections(self._mmap)
 
     def _parse_drcov_data(self, drcov_data):
         """Parse drcov coverage from the given data blob."""
         with io.BytesIO(drcov_data) as f:
+            self._parse_drcov_stream(f)
+
+    def _parse_drcov_stream(self, f):
+        """Parse drcov coverage from a (possibly compressed) filestream."""
+        with _open_decompressed(f) as f:
+            self._parse_drcov_sections(f)
+
+    def _parse_drcov_sections(self, f):
+        """Parse the sections of a drcov log from an uncompressed filestream."""
+        with self._phase("header", f):
             self._parse_drcov_header(f)
+        with self._phase("module_table", f):
             self._parse_module_table(f)
+        with self._phase("bb_table", f):
             self._parse_bb_table(f)
+        with self._phase("hit_count_map"):
             self._generate_bb_hit_count_map()
 
+        if self.stats is not None:
+            self.stats.blocks += len(self._raw_basic_blocks)
+
+    def _phase(self, name, f=None):
+        """Return a context manager recording a parse phase, if instrumented."""
+        if self.stats is None:
+            return NO_PHASE
+        return self.stats.phase(self, name, f)
+
     # --------------------------------------------------------------------------
     # Parsing Routines - Internals
     # --------------------------------------------------------------------------
@@ -184,7 +422,7 @@ class DrcovParser(CoverageParser):
         # parse drcov version from log
         #   eg: DRCOV VERSION: 2
         version_line = f.readline().strip()
-        print(version_line)
+        logger.debug("%s", version_line.decode(errors="replace"))
         self.version = int(version_line.split(b":")[1])
 
         # parse drcov flavor from log
@@ -242,7 +480,7 @@ class DrcovParser(CoverageParser):
         # seperate column names
         #   Windows:   id, base, end, entry, checksum, timestamp, path
         #   Mac/Linux: id, base, end, entry, path
-        columns = field_data.split(b", ")
+        self.module_table_columns = [column.decode() for column in field_data.split(b", ")]
 
     def _parse_module_table_modules(self, f):
         """Parse drcov log modules in the module table from filestream."""
@@ -254,6 +492,12 @@ class DrcovParser(CoverageParser):
     def _parse_bb_table(self, f):
         """Parse dcov log basic block table from filestream."""
         self._parse_bb_table_header(f)
+
+        # header-only scan, leave the table (and its allocation) alone
+        if not self.parse_blocks:
+            self._raw_basic_blocks = (DrcovBasicBlock * 0)()
+            return
+
         self._parse_bb_table_entries(f)
 
     def _parse_bb_table_header(self, f):
@@ -266,61 +510,157 @@ class DrcovParser(CoverageParser):
         # parse basic block count out of 'X bbs'
         count_data, data_name = field_data.split(b" ")
         self.bb_table_count = int(count_data)
+        self.bb_table_offset = f.tell()
 
-        # peek at the next few bytes to determine if this is a binary bb table.
+        # read the next few bytes to determine if this is a binary bb table.
         # An ascii bb table will have the line: 'module id, start, size:'
-        token = "module id"
-        saved_position = f.tell()
+        # (they're read rather than peeked at, as a buffered stream can only
+        # peek up to the end of its buffer; the table parsers pick them up)
+        token = b"module id"
+        self._bb_table_head = f.read(len(token))
 
         # is this an ascii table?
-        if f.read(len(token)) == token:
+        if self._bb_table_head == token:
             self.bb_table_is_binary = False
         # nope! binary table
         else:
             self.bb_table_is_binary = True
 
-        # seek back to the start of the table
-        f.seek(saved_position)
-
     def _parse_bb_table_entries(self, f):
         """Parse drcov log basic block table entries from filestream."""
+        # a mapped binary table is used in place, the OS pages it in on demand
+        if self.bb_table_is_binary and isinstance(f, mmap.mmap):
+            position = f.tell() - len(self._bb_table_head)
+            if len(f) - position < self.bb_table_count * sizeof(DrcovBasicBlock):
+                raise ValueError("Truncated BB table")
+            self._raw_basic_blocks = (DrcovBasicBlock * self.bb_table_count).from_buffer(f, position)
+            f.seek(position + sizeof(self._raw_basic_blocks))
+            return
+
         # allocate the ctypes structure array of basic blocks
         self._raw_basic_blocks = (DrcovBasicBlock * self.bb_table_count)()
 
         if self.bb_table_is_binary:
-            # read the basic block entries directly into the newly allocated array
-            f.readinto(self._raw_basic_blocks)
+            # read the basic block entries directly into the newly allocated
+            # array, after the bytes already read by the header parser
+            view = memoryview(self._raw_basic_blocks).cast("B")
+            head = self._bb_table_head[:len(view)]
+            view[:len(head)] = head
+            if len(head) + _readinto_chunked(f, view[len(head):]) != len(view):
+                raise ValueError("Truncated BB table")
         else:  # let's parse the text records
-            text_entry = f.readline().strip()
+            self._parse_bb_table_text(f)
+
+    def _parse_bb_table_text(self, f):
+        """Parse drcov log ascii basic block table entries from filestream."""
+        text_entry = (self._bb_table_head + f.readline()).strip()
 
-            if text_entry != "module id, start, size:":
-                raise ValueError("Invalid BB header: %r" % text_entry)
+        if text_entry != b"module id, start, size:":
+            raise ValueError("Invalid BB header: %r" % text_entry)
 
-            pattern = re.compile(r"^module\[\s*(?P<mod>[0-9]+)\]\:\s*(?P<start>0x[0-9a-f]+)\,\s*(?P<size>[0-9]+)$")
-            for basic_block in self._raw_basic_blocks:
-                text_entry = f.readline().strip()
+        # the table runs to the end of the log, so grab all of it at once
+        # (in place if the log is mapped) and parse it in a single pass
+        position = f.tell()
+        buffer = memoryview(f)[position:] if isinstance(f, mmap.mmap) else f.read()
 
-                match = pattern.match(text_entry)
-                if not match:
-                    raise ValueError("Invalid BB entry: %r" % text_entry)
+        try:
+            if np is not None:
+                consumed = _parse_bb_text_entries_chunked(buffer, self.bb_table, self.workers)
+            else:
+                consumed = _parse_bb_text_entries_slow(buffer, self._raw_basic_blocks)
+        finally:
+            # release the mapping, otherwise it could never be closed
+            if isinstance(buffer, memoryview):
+                buffer.release()
 
-                basic_block.offset = int(match.group("start"), 16)
-                basic_block.size = int(match.group("size"), 10)
-                basic_block.mod_id = int(match.group("mod"), 10)
+        # a stream was read to its end already (and may not even be seekable)
+        if isinstance(f, mmap.mmap):
+            f.seek(position + consumed)
 
     def _generate_bb_hit_count_map(self):
         """Generate basic block hit count map."""
+        if np is None:
+            return self._generate_bb_hit_count_map_slow()
+
+        # pack (mod_id, offset) into a single key so one unique pass both
+        # groups the blocks and counts the hits of each of them
+        keys = (self.mod_ids.astype(np.uint64) << np.uint64(32)) | self.offsets
+        unique_keys, first_blocks, counts = np.unique(keys, return_index=True, return_counts=True)
+        mod_ids = (unique_keys >> np.uint64(32)).astype(np.uint16)
+        offsets = unique_keys.astype(np.uint32)
+        sizes = self.sizes[first_blocks]
+
+        # the keys are sorted by mod_id first, so each module is one run
+        module_ids, starts = np.unique(mod_ids, return_index=True)
+        ends = np.append(starts[1:], len(mod_ids))
+
+        self.bb_hit_count_map = {}
+        for mod_id, start, end in zip(module_ids.tolist(), starts.tolist(), ends.tolist()):
+            self.bb_hit_count_map[mod_id] = DrcovHitCountMap(offsets[start:end], counts[start:end], sizes[start:end])
+
+    def _generate_bb_hit_count_map_slow(self):
+        """Generate basic block hit count map without numpy."""
+        hit_counts = {}
+        block_sizes = {}
         for bb in self._raw_basic_blocks:
-            mod_id = bb.mod_id
-            if mod_id not in self.bb_hit_count_map:
-                self.bb_hit_count_map[mod_id] = {}
-            if bb.offset in self.bb_hit_count_map[mod_id]:
-                self.bb_hit_count_map[mod_id][bb.offset] += 1
-            else:
-                self.bb_hit_count_map[mod_id][bb.offset] = 1
+            module_hits = hit_counts.setdefault(bb.mod_id, {})
+            module_hits[bb.offset] = module_hits.get(bb.offset, 0) + 1
+            block_sizes.setdefault((bb.mod_id, bb.offset), bb.size)
+
+        self.bb_hit_count_map = {}
+        for mod_id, module_hits in hit_counts.items():
+            offsets = sorted(module_hits)
+            counts = [module_hits[offset] for offset in offsets]
+            sizes = [block_sizes[(mod_id, offset)] for offset in offsets]
+            self.bb_hit_count_map[mod_id] = DrcovHitCountMap(array("I", offsets), array("Q", counts), array("H", sizes))
+
+    def _get_bb_module_index(self):
+        """
+        Return the per-module basic block index, building it on first use.
+
+        Returns:
+            (block indices grouped by module, mod_id -> (start, end) ranges
+            into them)
+        """
+        if self._bb_module_order is None:
+            self._build_bb_module_index()
+        return self._bb_module_order, self._bb_module_ranges
+
+    def _build_bb_module_index(self):
+        """Build the per-module basic block index."""
+        if np is None:
+            return self._build_bb_module_index_slow()
+
+        # a stable sort keeps the blocks of each module in log order. the
+        # index lives as long as the parser, so keep it at 4 bytes per block
+        order = np.argsort(self.mod_ids, kind="stable")
+        if len(order) < 1 << 32:
+            order = order.astype(np.uint32)
+        self._bb_module_order = order
+        sorted_mod_ids = self.mod_ids[order]
+
+        module_ids, starts = np.unique(sorted_mod_ids, return_index=True)
+        ends = np.append(starts[1:], len(sorted_mod_ids))
+        self._bb_module_ranges = {
+            mod_id: (start, end)
+            for mod_id, start, end in zip(module_ids.tolist(), starts.tolist(), ends.tolist())
+        }
+
+    def _build_bb_module_index_slow(self):
+        """Build the per-module basic block index without numpy."""
+        indices_by_module = {}
+        for index, bb in enumerate(self._raw_basic_blocks):
+            indices_by_module.setdefault(bb.mod_id, []).append(index)
+
+        self._bb_module_order = array("I" if len(self._raw_basic_blocks) < 1 << 32 else "Q")
+        self._bb_module_ranges = {}
+        for mod_id in sorted(indices_by_module):
+            start = len(self._bb_module_order)
+            self._bb_module_order.extend(indices_by_module[mod_id])
+            self._bb_module_ranges[mod_id] = (start, len(self._bb_module_order))
 
     def _convert_to_parsed_objects(self):
-        """Convert internal ctypes objects to clean ParsedModule and ParsedBasicBlock objects."""
+        """Convert internal module objects to clean ParsedModule objects."""
         # Convert modules
         self._parsed_modules = []
         for raw_module in self._raw_modules:
@@ -332,19 +672,16 @@ class DrcovParser(CoverageParser):
                 size=raw_module.size,
                 checksum=raw_module.checksum,
                 path=raw_module.path,
-                entry=raw_module.entry
+                entry=raw_module.entry,
+                timestamp=raw_module.timestamp
             )
             self._parsed_modules.append(parsed_module)
 
-        # Convert basic blocks
-        self._parsed_basic_blocks = []
-        for raw_bb in self._raw_basic_blocks:
-            parsed_bb = ParsedBasicBlock(
-                offset=raw_bb.offset,
-                size=raw_bb.size,
-                mod_id=raw_bb.mod_id
-            )
-            self._parsed_basic_blocks.append(parsed_bb)
+        # Index the modules for name and id lookups
+        self._module_index = DrcovModuleIndex(self._parsed_modules)
+        self._address_index = DrcovAddressIndex(self._parsed_modules)
+
+        # NOTE: basic blocks are converted lazily, see DrcovBasicBlockSequence
 
     # Legacy property accessors for backward compatibility
     @property
@@ -362,6 +699,356 @@ class DrcovParser(CoverageParser):
 DrcovData = DrcovParser
 
 
+def scan_header(filepath) -> DrcovParser:
+    """
+    Parse only the header, module table and basic block count of a drcov log.
+
+    The basic block table is never read or allocated: the returned parser
+    reports bb_table_count, but holds no basic blocks.
+    """
+    return DrcovParser(filepath, blocks=False)
+
+
+def scan_headers(filepaths: Iterable[str], max_workers: Optional[int] = None) \
+        -> Iterator[Tuple[str, Union[DrcovParser, Exception]]]:
+    """
+    Scan the headers of many drcov logs concurrently.
+
+    Header scans are dominated by I/O, so they run in a thread pool.
+
+    Args:
+        filepaths: Paths of the drcov logs to scan
+        max_workers: Number of worker threads
+
+    Yields:
+        (filepath, parser) pairs in input order, where parser is the
+        exception raised instead if the file failed to scan
+    """
+    def scan(filepath):
+        try:
+            return scan_header(filepath)
+        except Exception as e:
+            return e
+
+    filepaths = list(filepaths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from zip(filepaths, executor.map(scan, filepaths))
+
+
+# ------------------------------------------------------------------------------
+# drcov stream helpers
+# ------------------------------------------------------------------------------
+
+def _detect_compression(magic):
+    """Return the compression format identified by the given magic bytes."""
+    for signature, name in COMPRESSION_MAGICS:
+        if magic.startswith(signature):
+            return name
+    return None
+
+
+def _peek(f, size):
+    """Return the next size bytes of the filestream without consuming them."""
+    # seeking backwards in a compressed stream restarts decompression, so
+    # prefer peek() when the stream is buffered. peek() only returns what is
+    # buffered already though, which may be less than requested
+    if hasattr(f, "peek"):
+        data = f.peek(size)[:size]
+        if len(data) == size or not f.seekable():
+            return data
+
+    saved_position = f.tell()
+    data = f.read(size)
+    f.seek(saved_position)
+    return data
+
+
+def _open_decompressed(f):
+    """Wrap the filestream in a streaming decompressor, if it is compressed."""
+    compression = _detect_compression(_peek(f, 8))
+
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(f, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(f, mode="rb")
+    if compression == "zstd":
+        if zstd is None:
+            raise ValueError("zstd compressed drcov log, but no zstd module is available")
+        if hasattr(zstd, "ZstdFile"):
+            return zstd.ZstdFile(f, mode="rb")
+        return io.BufferedReader(zstd.ZstdDecompressor().stream_reader(f, closefd=False))
+
+    # not compressed, use the stream as is (and leave closing it to the caller)
+    return _Uncompressed(f)
+
+
+class _Uncompressed(object):
+    """Context manager handing out an uncompressed stream without closing it."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+# ascii basic block tables larger than this are split into chunks that are
+# parsed concurrently
+BB_TEXT_CHUNK_SIZE = 8 << 20
+
+# a single line of an ascii basic block table
+#   eg: module[  4]: 0x0000000000001090,   4
+BB_TEXT_ENTRY = re.compile(rb"module\[\s*([0-9]+)\]:\s*0x([0-9a-fA-F]+),\s*([0-9]+)\r?(?:\n|$)")
+
+# digit values of the ascii characters found in number fields of the text
+# table (255 if invalid). numbers are only ever padded with spaces on their
+# left, so spaces are treated as leading zeros (_parse_text_digits() rejects
+# them anywhere else)
+if np is not None:
+    _TEXT_DIGITS = np.full(256, 255, dtype=np.uint8)
+    _TEXT_DIGITS[ord(" ")] = 0
+    _TEXT_DIGITS[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+    _TEXT_DIGITS[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+    _TEXT_DIGITS[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+
+
+def _parse_bb_text_entries(buffer, table):
+    """
+    Parse ascii basic block table lines into a columnar block table.
+
+    The whole buffer is tokenized at once with NumPy. drcov pads every field
+    to a fixed width, so the table is usually viewed as a 2D matrix of
+    equally long lines; otherwise the delimiters of every line are located
+    with vectorized scans. The number fields are then decoded column-wise.
+
+    Args:
+        buffer: Bytes-like object starting at the first table line
+        table: DRCOV_BB_DTYPE array to fill, one entry per expected line
+
+    Returns:
+        Number of bytes of buffer consumed
+    """
+    if len(table) == 0:
+        return 0
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    consumed = _parse_bb_text_fixed(data, table)
+    if consumed is None:
+        consumed = _parse_bb_text_variable(data, table)
+    return consumed
+
+
+def _parse_bb_text_entries_chunked(buffer, table, workers):
+    """
+    Parse a large ascii basic block table in chunks, on a thread pool.
+
+    The buffer is split on line boundaries and every chunk is handed out as
+    a zero-copy memoryview, together with the disjoint slice of the table
+    its lines land in. NumPy releases the GIL for the bulk of the work, so
+    the chunks are decoded in parallel.
+
+    Returns:
+        Number of bytes of buffer consumed
+    """
+    count = len(table)
+    view = memoryview(buffer).cast("B")
+    if workers <= 1 or len(view) < 2 * BB_TEXT_CHUNK_SIZE:
+        return _parse_bb_text_entries(view, table)
+
+    data = np.frombuffer(view, dtype=np.uint8)
+    chunk_count = max(workers, len(view) // BB_TEXT_CHUNK_SIZE)
+
+    # cut the buffer into roughly equal chunks, each ending after a newline
+    bounds = [0]
+    for i in range(1, chunk_count):
+        cut = max(len(view) * i // chunk_count, bounds[-1])
+        newline = np.flatnonzero(data[cut:cut + 4096] == ord("\n"))
+        if not len(newline):
+            continue
+        bounds.append(cut + int(newline[0]) + 1)
+    bounds.append(len(view))
+
+    # count the lines of every chunk to find its slice of the table
+    jobs = []
+    first_row = 0
+    for start, end in zip(bounds, bounds[1:]):
+        if first_row >= count or start == end:
+            break
+        lines = int(np.count_nonzero(data[start:end] == ord("\n")))
+        if data[end - 1] != ord("\n"):
+            lines += 1
+        # the last chunk takes the remaining rows, so a truncated table has to
+        # be caught here, the chunk would only know its own line counts
+        if end == len(view) and first_row + lines < count:
+            raise ValueError("Truncated BB table: expected %u entries, found %u" % (count, first_row + lines))
+        last_row = count if end == len(view) else min(first_row + lines, count)
+        jobs.append((start, view[start:end], table[first_row:last_row]))
+        first_row = last_row
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(start, executor.submit(_parse_bb_text_entries, chunk, rows)) for start, chunk, rows in jobs]
+        consumed = [start + future.result() for start, future in futures]
+
+    return consumed[-1]
+
+
+def _parse_bb_text_fixed(data, table):
+    """Parse a text table whose lines all share one layout, or return None."""
+    count = len(table)
+    first_newline = np.flatnonzero(data[:256] == ord("\n"))
+    if not len(first_newline):
+        return None
+
+    width = int(first_newline[0]) + 1
+    if len(data) < count * width:
+        return None
+    lines = data[:count * width].reshape(count, width)
+
+    # locate the fields in the first line, and make sure every other line
+    # matches it everywhere outside of them ('module[', ']: 0x', ',' and the
+    # line ending)
+    first_line = bytes(lines[0])
+    if not BB_TEXT_ENTRY.match(first_line):
+        return None
+    open_bracket, close_bracket, hex_prefix, comma = [first_line.index(c) for c in (b"[", b"]", b"x", b",")]
+    line_end = width - 2 if first_line.endswith(b"\r\n") else width - 1
+
+    separators = np.r_[0:open_bracket + 1, close_bracket:hex_prefix + 1, comma, line_end:width]
+    if not (lines[:, separators] == lines[0, separators]).all():
+        return None
+
+    table["mod_id"] = _parse_text_digits(lines[:, open_bracket + 1:close_bracket], 10)
+    table["offset"] = _parse_text_digits(lines[:, hex_prefix + 1:comma], 16, max_digits=8, padded=False)
+    table["size"] = _parse_text_digits(lines[:, comma + 1:line_end], 10)
+    return count * width
+
+
+def _parse_bb_text_variable(data, table):
+    """Parse a text table with lines of differing layouts."""
+    count = len(table)
+    line_ends = np.flatnonzero(data == ord("\n"))[:count]
+
+    # the last line of the log may lack its newline
+    last_line_start = line_ends[-1] + 1 if len(line_ends) else 0
+    if len(line_ends) < count and last_line_start < len(data):
+        line_ends = np.append(line_ends, len(data))
+    if len(line_ends) < count:
+        raise ValueError("Truncated BB table: expected %u entries, found %u" % (count, len(line_ends)))
+
+    consumed = min(int(line_ends[-1]) + 1, len(data))
+    data = data[:consumed]
+
+    # every line holds exactly one of each delimiter, in this order
+    delimiters = [np.flatnonzero(data == ord(c)) for c in "[]x,"]
+    if any(len(positions) != count for positions in delimiters):
+        raise ValueError("Invalid BB table: malformed entries")
+    open_bracket, close_bracket, hex_prefix, comma = delimiters
+
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    if not ((open_bracket - line_starts == len(b"module")) & (open_bracket < close_bracket)
+            & (hex_prefix - close_bracket >= 3) & (hex_prefix < comma) & (comma < line_ends)).all():
+        raise ValueError("Invalid BB table: malformed entries")
+
+    # the text around the fields: 'module[', then ']:', optional spaces, '0x'
+    prefix = data[line_starts[:, None] + np.arange(len(b"module"))]
+    spacing = _gather_text_fields(data, close_bracket + 2, hex_prefix - 1)
+    if not ((prefix == np.frombuffer(b"module", dtype=np.uint8)).all() and (spacing == ord(" ")).all()
+            and (data[close_bracket + 1] == ord(":")).all() and (data[hex_prefix - 1] == ord("0")).all()):
+        raise ValueError("Invalid BB table: malformed entries")
+
+    # tolerate windows line endings
+    size_ends = line_ends - (data[np.minimum(line_ends, consumed) - 1] == ord("\r"))
+
+    table["mod_id"] = _parse_text_digits(_gather_text_fields(data, open_bracket + 1, close_bracket), 10)
+    # offsets are never padded, so pad them with zeros rather than spaces
+    offsets = _gather_text_fields(data, hex_prefix + 1, comma, fill=ord("0"))
+    table["offset"] = _parse_text_digits(offsets, 16, max_digits=8, padded=False)
+    table["size"] = _parse_text_digits(_gather_text_fields(data, comma + 1, size_ends), 10)
+    return consumed
+
+
+def _gather_text_fields(data, starts, ends, fill=ord(" ")):
+    """Gather data[starts[i]:ends[i]] into right-aligned rows, padded with fill."""
+    width = max(int((ends - starts).max()), 0)
+    positions = ends[:, None] + np.arange(-width, 0)
+    fields = data[np.maximum(positions, 0)]
+    fields[positions < starts[:, None]] = fill
+    return fields
+
+
+def _parse_text_digits(fields, base, max_digits=None, padded=True):
+    """
+    Decode a 2D array of right-aligned ascii numbers (one per row).
+
+    Numbers may be left padded with spaces if 'padded' is set; spaces are
+    rejected anywhere else, as are empty fields. Only the max_digits lowest
+    digits are accumulated, for fields whose higher digits would be
+    truncated away by the destination column anyway.
+    """
+    digits = _TEXT_DIGITS[fields]
+    spaces = fields == ord(" ")
+    if fields.shape[1] == 0:
+        invalid = np.ones(len(fields), dtype=bool)
+    elif padded:
+        invalid = (digits >= base).any(axis=1) | (spaces[:, 1:] & ~spaces[:, :-1]).any(axis=1) | spaces[:, -1]
+    else:
+        invalid = (digits >= base).any(axis=1) | spaces.any(axis=1)
+    if invalid.any():
+        row = int(np.argmax(invalid))
+        raise ValueError("Invalid BB entry: bad number %r" % bytes(fields[row]))
+
+    if max_digits is not None:
+        digits = digits[:, -max_digits:]
+
+    values = np.zeros(len(fields), dtype=np.uint64)
+    for column in digits.T:
+        values *= np.uint64(base)
+        values += column
+    return values
+
+
+def _parse_bb_text_entries_slow(buffer, blocks):
+    """Parse ascii basic block table lines into a DrcovBasicBlock array (no numpy)."""
+    position = 0
+    for basic_block in blocks:
+        match = BB_TEXT_ENTRY.match(buffer, position)
+        if not match:
+            raise ValueError("Invalid BB entry: %r" % bytes(buffer[position:position + 64]).split(b"\n")[0])
+
+        basic_block.mod_id = int(match.group(1), 10)
+        basic_block.offset = int(match.group(2), 16)
+        basic_block.size = int(match.group(3), 10)
+        position = match.end()
+
+    return position
+
+
+def _skip(f, size):
+    """Skip the next size bytes of the filestream, without seeking backwards."""
+    while size > 0:
+        data = f.read(min(size, BB_READ_CHUNK_SIZE))
+        if not data:
+            break
+        size -= len(data)
+
+
+def _readinto_chunked(f, buffer):
+    """Fill buffer from the filestream, one bounded chunk at a time."""
+    view = memoryview(buffer).cast("B")
+    filled = 0
+    while filled < len(view):
+        count = f.readinto(view[filled:filled + BB_READ_CHUNK_SIZE])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
 # ------------------------------------------------------------------------------
 # drcov module parser
 # ------------------------------------------------------------------------------
@@ -381,9 +1068,11 @@ class DrcovModule(object):
         self.entry = 0
         self.checksum = 0
         self.timestamp = 0
+        self.offset = 0
         self.path = ""
         self.filename = ""
         self.containing_id = 0
+        self.address_width = 16  # Hex digits of the address columns
 
         # parse the module
         self._parse_module(module_data, version)
@@ -426,6 +1115,7 @@ class DrcovModule(object):
         self.base = int(data[1], 16)
         self.end = int(data[2], 16)
         self.entry = int(data[3], 16)
+        self.address_width = len(data[1]) - 2
         if len(data) == 7:  # Windows Only
             self.checksum = int(data[4], 16)
             self.timestamp = int(data[5], 16)
@@ -440,7 +1130,8 @@ class DrcovModule(object):
         self.base = int(data[2], 16)
         self.end = int(data[3], 16)
         self.entry = int(data[4], 16)
-        if len(data) == 7:  # Windows Only
+        self.address_width = len(data[2]) - 2
+        if len(data) == 8:  # Windows Only
             self.checksum = int(data[5], 16)
             self.timestamp = int(data[6], 16)
         self.path = data[-1].decode()
@@ -455,7 +1146,8 @@ class DrcovModule(object):
         self.end = int(data[3], 16)
         self.entry = int(data[4], 16)
         self.offset = int(data[5], 16)
-        if len(data) == 7:  # Windows Only
+        self.address_width = len(data[2]) - 2
+        if len(data) == 9:  # Windows Only
             self.checksum = int(data[6], 16)
             self.timestamp = int(data[7], 16)
         self.path = data[-1].decode()
@@ -463,6 +1155,131 @@ class DrcovModule(object):
         self.filename = os.path.basename(self.path).strip("'")
 
 
+class DrcovModuleIndex(object):
+    """
+    Precomputed lookups over a module table.
+
+    Holds exact filename and id dicts for strict lookups. Substring lookups
+    scan the lowercased filenames at first; once they are frequent enough to
+    pay for it, a sorted suffix list of the filenames is built so that each
+    costs a binary search. For every lookup the module appearing first in
+    the table wins, exactly like a linear scan would.
+    """
+
+    # substring lookups answered by a scan before the suffix list is built
+    SCAN_LOOKUPS = 64
+
+    def __init__(self, modules):
+        self.modules = modules
+        self.by_id = {}
+        self.by_filename = {}
+        for module in modules:
+            self.by_id.setdefault(module.id, module)
+            self.by_filename.setdefault(module.filename, module)
+
+        # substring lookup state, built on demand
+        self._lower_filenames = None
+        self._lookups = 0
+        self._suffixes = None
+        self._min_position = None
+
+    def _build_suffixes(self):
+        """Build the sorted suffix list and its range-minimum table."""
+        suffixes = []
+        for position, filename in enumerate(self._lower_filenames):
+            suffixes.extend((filename[start:], position) for start in range(len(filename) + 1))
+        suffixes.sort()
+
+        self._suffixes = [suffix for suffix, _ in suffixes]
+        self._min_position = self._build_min_table([position for _, position in suffixes])
+
+    @staticmethod
+    def _build_min_table(positions):
+        """Build a sparse table answering range-minimum queries in O(1)."""
+        table = [positions]
+        width = 1
+        while width * 2 <= len(positions):
+            previous = table[-1]
+            table.append([min(previous[i], previous[i + width]) for i in range(len(positions) - width * 2 + 1)])
+            width *= 2
+        return table
+
+    def find_substring(self, needle: str):
+        """Return the first module whose lowercased filename contains needle."""
+        if self._suffixes is None:
+            if self._lower_filenames is None:
+                self._lower_filenames = [module.filename.lower() for module in self.modules]
+
+            self._lookups += 1
+            if self._lookups <= self.SCAN_LOOKUPS:
+                for position, filename in enumerate(self._lower_filenames):
+                    if needle in filename:
+                        return self.modules[position]
+                return None
+            self._build_suffixes()
+
+        # every suffix starting with the needle sorts into one contiguous run
+        start = bisect_left(self._suffixes, needle)
+        end = bisect_left(self._suffixes, needle + "\U0010ffff", start)
+        if start == end:
+            return None
+
+        level = (end - start).bit_length() - 1
+        row = self._min_position[level]
+        return self.modules[min(row[start], row[end - (1 << level)])]
+
+
+class DrcovAddressIndex(object):
+    """
+    Sorted interval index mapping absolute addresses to modules.
+
+    The [base, end) ranges of all modules are cut into elementary segments,
+    each owned by the innermost (smallest) module covering it, so nested
+    and overlapping modules resolve with a single binary search.
+    """
+
+    def __init__(self, modules):
+        self.modules = modules
+
+        # v1 module tables carry no addresses, there is nothing to index
+        mapped = [(position, module) for position, module in enumerate(modules) if module.end > module.base]
+        self._boundaries = sorted({module.base for _, module in mapped} | {module.end for _, module in mapped})
+        self._owners = [-1] * max(len(self._boundaries) - 1, 0)
+
+        # paint the largest modules first so nested ones overwrite them. on a
+        # tie the module appearing first in the table is painted last and wins
+        for position, module in sorted(mapped, key=lambda item: (-item[1].size, -item[0])):
+            start = bisect_left(self._boundaries, module.base)
+            end = bisect_left(self._boundaries, module.end, start)
+            self._owners[start:end] = [position] * (end - start)
+
+        # module ids per segment, with -1 for holes, used by batch lookups
+        self._owner_ids = [modules[owner].id if owner >= 0 else -1 for owner in self._owners]
+        if np is not None:
+            self._boundaries_array = np.array(self._boundaries, dtype=np.uint64)
+            self._owner_ids_array = np.array(self._owner_ids + [-1], dtype=np.int64)
+
+    def lookup(self, address: int):
+        """Return the module mapped at the given address, or None."""
+        segment = bisect_right(self._boundaries, address) - 1
+        if segment < 0 or segment >= len(self._owners) or self._owners[segment] < 0:
+            return None
+        return self.modules[self._owners[segment]]
+
+    def lookup_ids(self, addresses):
+        """Return the module ids mapped at the given addresses (-1 if none)."""
+        if np is None:
+            return [module.id if module else -1 for module in map(self.lookup, addresses)]
+
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        segments = np.searchsorted(self._boundaries_array, addresses, side="right") - 1
+
+        # addresses before the first or past the last boundary hit the
+        # trailing -1 sentinel of the owner array
+        segments[segments < 0] = len(self._owner_ids_array) - 1
+        return self._owner_ids_array[segments]
+
+
 # ------------------------------------------------------------------------------
 # drcov basic block parser
 # ------------------------------------------------------------------------------
@@ -491,6 +1308,123 @@ class DrcovBasicBlock(Structure):
     ]
 
 
+class DrcovBasicBlockSequence(Sequence):
+    """
+    Lazy, read-only sequence of ParsedBasicBlock objects.
+
+    The sequence is backed directly by a raw DrcovBasicBlock array (and an
+    optional list of indices into it). ParsedBasicBlock objects are only
+    created when an element is accessed, and slicing returns another view.
+    """
+
+    __slots__ = ("_blocks", "_indices")
+
+    def __init__(self, blocks, indices=None):
+        self._blocks = blocks
+        self._indices = range(len(blocks)) if indices is None else indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DrcovBasicBlockSequence(self._blocks, self._indices[index])
+        return self._make_block(self._blocks[self._indices[index]])
+
+    def __iter__(self):
+        blocks = self._blocks
+        make_block = self._make_block
+        for index in self._indices:
+            yield make_block(blocks[index])
+
+    def __repr__(self):
+        return f"DrcovBasicBlockSequence(len={len(self)})"
+
+    @staticmethod
+    def _make_block(raw_bb):
+        return ParsedBasicBlock(offset=raw_bb.offset, size=raw_bb.size, mod_id=raw_bb.mod_id)
+
+
+class DrcovHitCountMap(Mapping):
+    """
+    Read-only mapping of basic block offset -> hit count for one module.
+
+    Backed by parallel arrays sorted by offset: 'offsets' holds the unique
+    block offsets, 'counts' the number of times each was hit and 'sizes'
+    the size of each block (as first seen in the log).
+    """
+
+    __slots__ = ("offsets", "counts", "sizes")
+
+    def __init__(self, offsets, counts, sizes):
+        self.offsets = offsets
+        self.counts = counts
+        self.sizes = sizes
+
+    @classmethod
+    def empty(cls):
+        """Return a map without any blocks."""
+        return cls(array("I"), array("Q"), array("H"))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        return iter(self.offsets.tolist())
+
+    def __getitem__(self, offset):
+        offsets = self.offsets
+        if np is not None and isinstance(offsets, np.ndarray):
+            # search with a key of the array's own type, anything else makes
+            # NumPy convert the whole array first
+            if not 0 <= offset <= 0xFFFFFFFF:
+                raise KeyError(offset)
+            index = int(offsets.searchsorted(offsets.dtype.type(offset)))
+        else:
+            index = bisect_left(offsets, offset)
+        if index == len(offsets) or offsets[index] != offset:
+            raise KeyError(offset)
+        return int(self.counts[index])
+
+    def items(self) -> "_HitCountItemsView":
+        return _HitCountItemsView(self)
+
+    def values(self) -> "_HitCountValuesView":
+        return _HitCountValuesView(self)
+
+    def __repr__(self):
+        return f"DrcovHitCountMap(blocks={len(self)}, hits={int(sum(self.counts))})"
+
+
+class _HitCountItemsView(ItemsView):
+    """(offset, count) view of a DrcovHitCountMap, iterated column-wise."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        return zip(self._mapping.offsets.tolist(), self._mapping.counts.tolist())
+
+
+class _HitCountValuesView(ValuesView):
+    """Hit count view of a DrcovHitCountMap, iterated column-wise."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        return iter(self._mapping.counts.tolist())
+
+
+# NumPy mirror of DrcovBasicBlock, used to view the raw table column-wise
+if np is not None:
+    DRCOV_BB_DTYPE = np.dtype([
+        ('offset', '<u4'),
+        ('size', '<u2'),
+        ('mod_id', '<u2'),
+    ])
+else:
+    DRCOV_BB_DTYPE = None
+
+
 # ------------------------------------------------------------------------------
 # Command Line Testing
 # ------------------------------------------------------------------------------
@@ -499,10 +1433,11 @@ if __name__ == "__main__":
     argparse = argparse.ArgumentParser(description="DrCov log parser test harness")
     argparse.add_argument("--input", "-i", help="Path to the drcov file to parse")
     argparse.add_argument("--verbose", "-v", action="store_true", help="Enable verbose output")
+    argparse.add_argument("--stats", action="store_true", help="Print per-phase parse statistics")
     argv = argparse.parse_args()
 
     # attempt file parse
-    x = DrcovParser(argv.input)
+    x = DrcovParser(argv.input, instrument=argv.stats)
     modules = x.modules
     for module in modules:
         print(f"Module {module.id}: {module.filename} @ {hex(module.base)}-{hex(module.end)}")
@@ -511,3 +1446,5 @@ if __name__ == "__main__":
         if argv.verbose:
             for block in blocks:
                 print(f"    Block @ {hex(block.offset)} of size {block.size}")
+    if argv.stats:
+        print(x.stats, file=sys.stderr)
@@ -0,0 +1,190 @@
+"""
+Columnar export of parsed coverage.
+
+Writes the module table, the basic block table and the hit count table of a
+parsed drcov log as flat columns, to an uncompressed NumPy .npz archive or
+(when pyarrow is installed) an Arrow IPC file, ready to be turned into
+DataFrames. Columns are streamed out one module at a time, so exporting a
+multi-GB log never materializes more than a single module's blocks, and the
+loaders map the exported files back in without reading them.
+"""
+
+import json
+import mmap
+import struct
+import zipfile
+from typing import Dict
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional, only the Arrow IPC export needs it
+    pa = None
+
+
+# module table columns of an export, in order
+MODULE_COLUMNS = ("id", "base", "end", "size", "entry", "checksum", "timestamp", "path", "filename")
+
+
+# ------------------------------------------------------------------------------
+# NumPy .npz
+# ------------------------------------------------------------------------------
+
+def export_npz(parser, filepath) -> None:
+    """
+    Export a parsed log to an uncompressed .npz archive.
+
+    The archive holds the columns 'module_<name>' for each of MODULE_COLUMNS,
+    'block_mod_id', 'block_offset' and 'block_size' for the basic blocks
+    (grouped by module, in log order within each module) and 'hit_mod_id',
+    'hit_offset', 'hit_count' and 'hit_size' for the unique blocks.
+
+    Args:
+        parser: Parsed DrcovParser
+        filepath: Path of the archive to write
+    """
+    modules = _module_columns(parser)
+    block_order, block_ranges = parser._get_bb_module_index()
+    block_ranges = sorted(block_ranges.items())
+    block_count = sum(end - start for _, (start, end) in block_ranges)
+    hit_maps = sorted(parser.bb_hit_count_map.items())
+    hit_count = sum(len(hits) for _, hits in hit_maps)
+
+    def blocks(column):
+        for _, (start, end) in block_ranges:
+            yield column[block_order[start:end]]
+
+    with zipfile.ZipFile(filepath, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, values in modules.items():
+            _write_npy(archive, "module_" + name, values.dtype, len(values), [values])
+
+        _write_npy(archive, "block_mod_id", np.uint16, block_count,
+                   (np.full(end - start, mod_id, dtype=np.uint16) for mod_id, (start, end) in block_ranges))
+        _write_npy(archive, "block_offset", np.uint32, block_count, blocks(parser.offsets))
+        _write_npy(archive, "block_size", np.uint16, block_count, blocks(parser.sizes))
+
+        _write_npy(archive, "hit_mod_id", np.uint16, hit_count,
+                   (np.full(len(hits), mod_id, dtype=np.uint16) for mod_id, hits in hit_maps))
+        _write_npy(archive, "hit_offset", np.uint32, hit_count, (hits.offsets for _, hits in hit_maps))
+        _write_npy(archive, "hit_count", np.int64, hit_count, (hits.counts for _, hits in hit_maps))
+        _write_npy(archive, "hit_size", np.uint16, hit_count, (hits.sizes for _, hits in hit_maps))
+
+
+def load_npz(filepath) -> Dict[str, np.ndarray]:
+    """
+    Load the columns of an exported .npz archive.
+
+    Uncompressed members are memory-mapped (read-only) rather than read, so
+    reopening even a large export is instant. Compressed members, eg. from
+    np.savez_compressed(), are read normally.
+
+    Returns:
+        Column name -> array
+    """
+    columns = {}
+    with open(filepath, "rb") as f, zipfile.ZipFile(f) as archive:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        for info in archive.infolist():
+            name = info.filename[:-len(".npy")] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    columns[name] = np.lib.format.read_array(member)
+                continue
+
+            # the member data follows its local file header, name and extra field
+            name_length, extra_length = struct.unpack_from("<HH", mapped, info.header_offset + 26)
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if fortran_order or len(shape) != 1:
+                raise ValueError("Unexpected array layout of member '%s'" % info.filename)
+            columns[name] = np.frombuffer(mapped, dtype=dtype, count=shape[0], offset=f.tell())
+
+    return columns
+
+
+def _write_npy(archive, name, dtype, length, chunks) -> None:
+    """Stream a one-dimensional array into an archive member, chunk by chunk."""
+    dtype = np.dtype(dtype)
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)}
+
+    with archive.open(name + ".npy", "w", force_zip64=True) as member:
+        np.lib.format.write_array_header_1_0(member, header)
+        for chunk in chunks:
+            member.write(np.ascontiguousarray(chunk, dtype=dtype).data)
+
+
+# ------------------------------------------------------------------------------
+# Arrow IPC
+# ------------------------------------------------------------------------------
+
+def export_arrow(parser, filepath, blocks: bool = False) -> None:
+    """
+    Export a parsed log to an Arrow IPC file, one record batch per module.
+
+    The file holds the hit count table (mod_id, offset, size, count), or with
+    blocks=True the basic block table (mod_id, offset, size). The module
+    table is stored as JSON in the 'drcov.modules' schema metadata.
+
+    Args:
+        parser: Parsed DrcovParser
+        filepath: Path of the file to write
+        blocks: Export the basic blocks rather than the hit counts
+    """
+    if pa is None:
+        raise ImportError("Arrow IPC export requires pyarrow")
+
+    fields = [("mod_id", pa.uint16()), ("offset", pa.uint32()), ("size", pa.uint16())]
+    if not blocks:
+        fields.append(("count", pa.int64()))
+
+    modules = [{name: getattr(module, name) for name in MODULE_COLUMNS} for module in parser.get_modules()]
+    schema = pa.schema(fields, metadata={"drcov.modules": json.dumps(modules)})
+
+    with pa.OSFile(str(filepath), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        if blocks:
+            block_order, block_ranges = parser._get_bb_module_index()
+            for mod_id, (start, end) in sorted(block_ranges.items()):
+                indices = block_order[start:end]
+                columns = [np.full(end - start, mod_id, dtype=np.uint16), parser.offsets[indices],
+                           parser.sizes[indices]]
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+        else:
+            for mod_id, hits in sorted(parser.bb_hit_count_map.items()):
+                columns = [np.full(len(hits), mod_id, dtype=np.uint16), hits.offsets, hits.sizes,
+                           np.asarray(hits.counts, dtype=np.int64)]
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+
+
+def load_arrow(filepath):
+    """
+    Load an exported Arrow IPC file as a pyarrow Table.
+
+    The file is memory-mapped, so the table's columns are zero-copy views
+    of it. The module table is available through load_arrow_modules().
+    """
+    if pa is None:
+        raise ImportError("Arrow IPC loading requires pyarrow")
+    return pa.ipc.open_file(pa.memory_map(str(filepath), "r")).read_all()
+
+
+def load_arrow_modules(table):
+    """Return the module table stored in a loaded Arrow export, as dicts."""
+    return json.loads(table.schema.metadata[b"drcov.modules"])
+
+
+def _module_columns(parser) -> Dict[str, np.ndarray]:
+    """Return the module table of a parsed log as columns."""
+    modules = parser.get_modules()
+    columns = {}
+    for name in MODULE_COLUMNS:
+        values = [getattr(module, name) for module in modules]
+        if name in ("path", "filename"):
+            columns[name] = np.array(values, dtype=str)
+        else:
+            columns[name] = np.array(values, dtype=np.uint16 if name == "id" else np.uint64)
+    return columns
@@ -0,0 +1,89 @@
+"""
+Incremental new-coverage detection.
+
+A CoverageFrontier holds everything a campaign has covered so far and tells,
+for every newly arriving drcov log, which blocks it covers for the first
+time. The cost of an ingest is proportional to the size of the new log, not
+to the size of the accumulated corpus.
+"""
+
+from typing import List, Union
+
+import numpy as np
+
+from bitmap import ModuleBitmap
+from coverage_set import ModuleCoverage, module_coverages
+from drcov import DrcovParser
+from registry import ModuleRegistry
+
+
+class CoverageFrontier(object):
+    """
+    Stateful set of the blocks covered so far, across many drcov logs.
+
+    Modules are identified through a ModuleRegistry, and the covered offsets
+    of every module are kept in a ModuleBitmap sized from the module size.
+    """
+
+    def __init__(self, registry: ModuleRegistry = None):
+        self.registry = registry or ModuleRegistry()
+        self.block_count = 0
+        self.log_count = 0
+        self._covered = []  # global module id -> ModuleBitmap of the covered offsets
+
+    def ingest(self, source: Union[str, bytes, DrcovParser]) -> List[ModuleCoverage]:
+        """
+        Add a drcov log to the frontier.
+
+        Args:
+            source: Path to a drcov log, its raw (possibly compressed) bytes,
+                or an already parsed DrcovParser
+
+        Returns:
+            Coverage summaries holding only the blocks never covered before,
+            one per module with new blocks (an empty list if nothing is new)
+        """
+        if isinstance(source, DrcovParser):
+            parser = source
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            parser = DrcovParser(data=bytes(source))
+        else:
+            parser = DrcovParser(source)
+
+        remap = self.registry.remap(parser)
+
+        new_coverage = []
+        for coverage in module_coverages(parser):
+            offsets = coverage.offsets
+            covered = self._bitmap(int(remap[coverage.mod_id]), coverage.size)
+
+            fresh = ~covered.contains(offsets)
+            if not fresh.any():
+                continue
+            covered.update(offsets[fresh])
+
+            new_coverage.append(coverage.with_blocks(offsets[fresh], coverage.counts[fresh], coverage.sizes[fresh]))
+            self.block_count += int(np.count_nonzero(fresh))
+
+        self.log_count += 1
+        return new_coverage
+
+    def is_covered(self, module, offset: int) -> bool:
+        """Tell whether a block of a module has been covered already."""
+        global_id = self.registry.get_global_id(module)
+        if global_id < 0 or global_id >= len(self._covered) or self._covered[global_id] is None:
+            return False
+        return offset in self._covered[global_id]
+
+    def _bitmap(self, global_id: int, size: int) -> ModuleBitmap:
+        """Return the bitmap of a module, creating it on first use."""
+        while len(self._covered) <= global_id:
+            self._covered.append(None)
+
+        covered = self._covered[global_id]
+        if covered is None:
+            covered = self._covered[global_id] = ModuleBitmap.from_offsets([], size)
+        return covered
+
+    def __repr__(self):
+        return f"CoverageFrontier(logs={self.log_count}, blocks={self.block_count})"
@@ -0,0 +1,157 @@
+"""
+Parse instrumentation.
+
+Collects per-phase statistics of DrcovParser.parse() (header, module table,
+basic block table, hit count map, ...): wall and CPU time, bytes consumed
+from the log and, optionally, tracemalloc allocation deltas. Each finished
+phase is reported to an optional callback and logged at DEBUG level on the
+'drcov' logger.
+
+Instrumentation is opt-in; a parser without it only pays for entering and
+leaving a no-op context manager per phase.
+"""
+
+import logging
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Callable, Dict, Optional
+
+
+logger = logging.getLogger("drcov")
+
+# context handed out for every phase of a parser without instrumentation
+NO_PHASE = nullcontext()
+
+
+class PhaseStats(object):
+    """Statistics of a single parse phase."""
+
+    __slots__ = ("name", "wall_time", "cpu_time", "bytes_read", "allocated", "peak_allocated")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_time = 0.0  # seconds
+        self.cpu_time = 0.0  # seconds, of the whole process
+        self.bytes_read = 0  # bytes consumed from the (decompressed) log
+        self.allocated = None  # net bytes allocated, when tracing allocations
+        self.peak_allocated = None  # peak bytes allocated, when tracing allocations
+
+    def __repr__(self):
+        text = (f"{self.name}: wall={self.wall_time * 1000:.3f}ms cpu={self.cpu_time * 1000:.3f}ms "
+                f"read={self.bytes_read}")
+        if self.allocated is not None:
+            text += f" allocated={self.allocated} peak={self.peak_allocated}"
+        return text
+
+
+class ParseStats(object):
+    """
+    Statistics of a parse, phase by phase.
+
+    Phases are kept in the order they ran; a phase that runs more than once
+    accumulates.
+    """
+
+    def __init__(self, callback: Optional[Callable] = None, trace_allocations: bool = False):
+        """
+        Args:
+            callback: Called as callback(parser, phase_stats) after each phase
+            trace_allocations: Record tracemalloc deltas (tracing is started
+                for the parse if it isn't running already)
+        """
+        self.callback = callback
+        self.trace_allocations = trace_allocations
+        self.phases: Dict[str, PhaseStats] = {}
+        self.blocks = 0  # basic blocks parsed
+
+    @property
+    def wall_time(self) -> float:
+        """Total wall time of all phases, in seconds."""
+        return sum(phase.wall_time for phase in self.phases.values())
+
+    @property
+    def cpu_time(self) -> float:
+        """Total CPU time of all phases, in seconds."""
+        return sum(phase.cpu_time for phase in self.phases.values())
+
+    @property
+    def bytes_read(self) -> int:
+        """Total bytes consumed from the log."""
+        return sum(phase.bytes_read for phase in self.phases.values())
+
+    def phase(self, parser, name: str, stream=None) -> "_PhaseTimer":
+        """Return a context manager recording a phase of the given parser."""
+        return _PhaseTimer(self, parser, name, stream)
+
+    def __getitem__(self, name) -> PhaseStats:
+        return self.phases[name]
+
+    def __iter__(self):
+        return iter(self.phases.values())
+
+    def __repr__(self):
+        return "\n".join([f"ParseStats(wall={self.wall_time * 1000:.3f}ms, cpu={self.cpu_time * 1000:.3f}ms, "
+                          f"read={self.bytes_read}, blocks={self.blocks})"]
+                         + ["  %r" % phase for phase in self.phases.values()])
+
+
+class _PhaseTimer(object):
+    """Context manager measuring one phase into a ParseStats."""
+
+    def __init__(self, stats: ParseStats, parser, name: str, stream):
+        self.stats = stats
+        self.parser = parser
+        self.name = name
+        self.stream = stream
+        self.started_tracing = False
+
+    def __enter__(self):
+        if self.stats.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+
+        self.start_position = _tell(self.stream)
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall_time = time.perf_counter() - self.start_wall
+        cpu_time = time.process_time() - self.start_cpu
+
+        phase = self.stats.phases.get(self.name)
+        if phase is None:
+            phase = self.stats.phases[self.name] = PhaseStats(self.name)
+        phase.wall_time += wall_time
+        phase.cpu_time += cpu_time
+
+        end_position = _tell(self.stream)
+        if self.start_position is not None and end_position is not None:
+            phase.bytes_read += end_position - self.start_position
+
+        if self.stats.trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            phase.allocated = (phase.allocated or 0) + current - self.start_memory
+            phase.peak_allocated = max(phase.peak_allocated or 0, peak - self.start_memory)
+            if self.started_tracing:
+                tracemalloc.stop()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: %r", self.parser.filepath or "<data>", phase)
+        if self.stats.callback is not None:
+            self.stats.callback(self.parser, phase)
+        return False
+
+
+def _tell(stream) -> Optional[int]:
+    """Position of a stream, or None if there is no (usable) stream."""
+    if stream is None:
+        return None
+    try:
+        return stream.tell()
+    except (OSError, ValueError):
+        return None
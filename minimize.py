@@ -0,0 +1,137 @@
+"""
+Corpus minimization over drcov coverage.
+
+Picks a small set of inputs whose drcov logs together cover every block the
+whole corpus covers, by running a lazy-greedy weighted set cover: inputs are
+chosen by newly covered blocks per unit of cost (1, input size, execution
+time, ...), and marginal gains are only recomputed for the input at the top
+of the priority queue.
+"""
+
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from aggregator import map_logs, summarize_file
+from bitmap import ModuleBitmap
+from coverage_set import ModuleCoverage
+
+
+class CorpusMinimizer(object):
+    """
+    Greedy weighted set cover over the block coverage of many inputs.
+
+    Coverage of every input is kept as sorted offset arrays per module, and
+    the blocks covered so far as one ModuleBitmap per module, so a gain
+    update costs time proportional to the size of the input's coverage.
+    """
+
+    def __init__(self):
+        self.names: List[Any] = []
+        self.costs: List[float] = []
+        self.errors: Dict[Any, str] = {}
+        self._coverage = []  # input index -> [(module index, offsets), ...]
+        self._module_indices = {}  # module key -> module index
+        self._module_sizes = []  # module index -> bitmap size
+
+    def add(self, name, coverages: Iterable[ModuleCoverage], cost: float = 1.0) -> None:
+        """
+        Add an input to the corpus.
+
+        Args:
+            name: Identifier of the input, returned by minimize()
+            coverages: Per-module coverage of the input's drcov log
+            cost: Weight of the input, eg. its size or execution time
+        """
+        if cost <= 0:
+            raise ValueError("Input cost must be positive")
+
+        coverage = []
+        for module in coverages:
+            module_index = self._module_indices.setdefault(module.key, len(self._module_indices))
+            if module_index == len(self._module_sizes):
+                self._module_sizes.append(0)
+            last = int(module.offsets[-1]) + 1 if len(module.offsets) else 0
+            self._module_sizes[module_index] = max(self._module_sizes[module_index], module.size, last)
+            coverage.append((module_index, module.offsets))
+
+        self.names.append(name)
+        self.costs.append(float(cost))
+        self._coverage.append(coverage)
+
+    def add_logs(self, logs: Union[Dict[Any, str], Iterable[str]],
+                 costs: Optional[Union[Dict[Any, float], Callable[[Any], float]]] = None,
+                 max_workers: Optional[int] = None) -> None:
+        """
+        Parse drcov logs in a process pool and add them to the corpus.
+
+        Args:
+            logs: Mapping of input name -> drcov log path, or log paths (which
+                then double as input names)
+            costs: Mapping or callable giving the cost of each input name,
+                eg. lambda name: os.path.getsize(name); defaults to 1
+            max_workers: Number of worker processes, 0 to parse in-process
+        """
+        if not isinstance(logs, dict):
+            logs = {path: path for path in logs}
+        names, paths = list(logs), list(logs.values())
+
+        for name, (_, summaries) in zip(names, map_logs(summarize_file, paths, max_workers)):
+            if isinstance(summaries, Exception):
+                self.errors[name] = str(summaries)
+                continue
+
+            if costs is None:
+                cost = 1.0
+            elif callable(costs):
+                cost = costs(name)
+            else:
+                cost = costs[name]
+            self.add(name, summaries, cost)
+
+    def minimize(self) -> List[Any]:
+        """
+        Select a subset of inputs covering every block the corpus covers.
+
+        Returns:
+            Names of the selected inputs, in selection order
+        """
+        covered = [ModuleBitmap.from_offsets([], size) for size in self._module_sizes]
+
+        # max-heap on gain per cost; ties go to the cheaper, then earlier input
+        heap = []
+        for index, coverage in enumerate(self._coverage):
+            gain = sum(len(offsets) for _, offsets in coverage)
+            if gain:
+                heap.append((-gain / self.costs[index], self.costs[index], index))
+        heapq.heapify(heap)
+
+        selected = []
+        while heap:
+            _, cost, index = heapq.heappop(heap)
+            gain = self._gain(index, covered)
+            if not gain:
+                continue
+
+            # gains only ever shrink, so if the refreshed entry still beats the
+            # (possibly stale) next best, this input is the true maximum
+            entry = (-gain / cost, cost, index)
+            if heap and entry > heap[0]:
+                heapq.heappush(heap, entry)
+                continue
+
+            for module_index, offsets in self._coverage[index]:
+                covered[module_index].update(offsets)
+            selected.append(self.names[index])
+
+        return selected
+
+    def _gain(self, index: int, covered) -> int:
+        """Number of blocks of an input not covered yet."""
+        return sum(len(offsets) - int(np.count_nonzero(covered[module_index].contains(offsets)))
+                   for module_index, offsets in self._coverage[index])
+
+    def __len__(self):
+        return len(self.names)
+
@@ -0,0 +1,95 @@
+"""
+Cross-run module identity.
+
+Module ids and load addresses differ between drcov logs. The ModuleRegistry
+canonicalizes modules by (path, checksum), the module_key() shared with
+every other cross-run structure, hands out stable global ids, and maps each
+log's module ids onto them so that block tables of many runs can be
+re-keyed with a single vectorized gather.
+"""
+
+from collections import OrderedDict
+from typing import Any, List
+
+import numpy as np
+
+from coverage_set import module_key
+
+
+# remap value of module ids that don't appear in a log's module table
+UNKNOWN_MODULE = np.uint32(0xFFFFFFFF)
+
+
+class ModuleRegistry(object):
+    """
+    Registry assigning stable global ids to modules seen across many logs.
+
+    Remap arrays are cached per module table, so ingesting further logs with
+    an already seen set of modules costs a single dictionary lookup.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        Args:
+            cache_size: Number of distinct module tables to cache remaps for
+        """
+        self.modules: List[Any] = []  # global id -> first module seen with that identity
+        self._global_ids = {}  # module key -> global id
+        self._remaps = OrderedDict()  # module table key -> remap array
+        self.cache_size = cache_size
+
+    module_key = staticmethod(module_key)
+
+    def register(self, module) -> int:
+        """Return the global id of a module, registering it if it is new."""
+        key = self.module_key(module)
+        global_id = self._global_ids.get(key)
+        if global_id is None:
+            global_id = self._global_ids[key] = len(self.modules)
+            self.modules.append(module)
+        return global_id
+
+    def get_global_id(self, module) -> int:
+        """Return the global id of an already registered module, or -1."""
+        return self._global_ids.get(self.module_key(module), -1)
+
+    def remap(self, parser) -> np.ndarray:
+        """
+        Return the mod_id -> global id remap array of a parsed log.
+
+        Indexing the array with the log's module ids yields global ids, and
+        UNKNOWN_MODULE for ids missing from the module table.
+        """
+        modules = parser.get_modules()
+        table_key = tuple((module.id,) + self.module_key(module) for module in modules)
+
+        remap = self._remaps.get(table_key)
+        if remap is not None:
+            self._remaps.move_to_end(table_key)
+            return remap
+
+        size = max((module.id for module in modules), default=-1) + 1
+        remap = np.full(size, UNKNOWN_MODULE, dtype=np.uint32)
+        for module in modules:
+            remap[module.id] = self.register(module)
+        remap.flags.writeable = False
+
+        self._remaps[table_key] = remap
+        if len(self._remaps) > self.cache_size:
+            self._remaps.popitem(last=False)
+        return remap
+
+    def rekey(self, parser) -> np.ndarray:
+        """Return the global module id of every basic block of a parsed log."""
+        remap = self.remap(parser)
+        if len(remap) == 0:
+            return np.full(len(parser.mod_ids), UNKNOWN_MODULE, dtype=np.uint32)
+
+        # block ids past the module table would index out of bounds
+        mod_ids = parser.mod_ids
+        if len(mod_ids) and int(mod_ids.max()) >= len(remap):
+            remap = np.append(remap, np.full(int(mod_ids.max()) + 1 - len(remap), UNKNOWN_MODULE))
+        return remap[mod_ids]
+
+    def __len__(self):
+        return len(self.modules)
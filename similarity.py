@@ -0,0 +1,212 @@
+"""
+Trace similarity search with MinHash and locality-sensitive hashing.
+
+A MinHasher turns the covered block set of a run into a fixed-size MinHash
+signature, whose matching positions estimate the Jaccard similarity of two
+block sets. An LSHIndex buckets signatures band by band, so the most similar
+stored traces are found by looking at a few candidates rather than scanning
+every signature.
+"""
+
+import hashlib
+from typing import Any, Iterable, List, Tuple
+
+import numpy as np
+
+from coverage_set import ModuleCoverage, module_coverages
+
+
+# a signature slot no element hashed into (the block set was empty)
+EMPTY_SLOT = np.uint32(0xFFFFFFFF)
+
+# number of element x permutation hashes computed at once
+HASH_BATCH_SIZE = 1 << 22
+
+
+class MinHasher(object):
+    """
+    MinHash signatures of covered block sets.
+
+    Blocks are identified by module (path, checksum) and offset, so the
+    signatures of different runs are comparable whatever their module ids
+    and load addresses. The same num_perm and seed must be used for every
+    signature that is compared.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 0):
+        """
+        Args:
+            num_perm: Signature size; the similarity estimate has a standard
+                error of about 1/sqrt(num_perm)
+            seed: Seed of the hash functions
+        """
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.seed = seed
+
+        # multiply-shift hashes (a * x + b) >> 32, with odd multipliers
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+
+    def signature(self, parser) -> np.ndarray:
+        """Return the signature of the blocks covered by a parsed log."""
+        return self.signature_from_coverages(module_coverages(parser))
+
+    def signature_from_coverages(self, coverages: Iterable[ModuleCoverage]) -> np.ndarray:
+        """Return the signature of the blocks of per-module coverage summaries."""
+        elements = [_block_keys(coverage.key, coverage.offsets) for coverage in coverages]
+        return self.signature_from_keys(np.concatenate(elements) if elements else np.empty(0, np.uint64))
+
+    def signature_from_keys(self, keys: np.ndarray) -> np.ndarray:
+        """Return the signature of a set of 64-bit element keys."""
+        signature = np.full(self.num_perm, EMPTY_SLOT, dtype=np.uint32)
+
+        # bound the size of the element x permutation matrix
+        step = max(1, HASH_BATCH_SIZE // self.num_perm)
+        for start in range(0, len(keys), step):
+            batch = keys[start:start + step]
+            hashes = (self._a[:, None] * batch[None, :] + self._b[:, None]) >> np.uint64(32)
+            np.minimum(signature, hashes.min(axis=1).astype(np.uint32), out=signature)
+        return signature
+
+
+def estimate_similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two block sets from their signatures."""
+    return float(np.mean(left == right))
+
+
+class LSHIndex(object):
+    """
+    Locality-sensitive hashing index over MinHash signatures.
+
+    Signatures are split into 'bands' bands of num_perm / bands rows; two
+    traces become candidates if any band matches exactly, which happens
+    with probability 1 - (1 - s^rows)^bands for a similarity s. Candidates
+    are then ranked by their estimated similarity.
+
+    Every band is kept as a sorted array of 32-bit band hashes, so an index
+    of 1M signatures of 64 slots takes about 400 MB.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 0):
+        """
+        Args:
+            num_perm: Size of the indexed signatures
+            bands: Number of bands, must divide num_perm; more bands find
+                less similar candidates, at the cost of more of them
+            seed: Seed of the band hash functions
+        """
+        if num_perm % bands:
+            raise ValueError("The number of bands must divide the signature size")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.names: List[Any] = []
+
+        rng = np.random.default_rng(seed)
+        self._band_multipliers = rng.integers(0, 1 << 63, self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._band_keys = np.empty((0, bands), dtype=np.uint32)
+        self._count = 0
+
+        # per band: band hashes of the first '_indexed' signatures, sorted,
+        # and the signature ids in that order; later ones are still pending
+        self._sorted_keys = [np.empty(0, dtype=np.uint32) for _ in range(bands)]
+        self._sorted_ids = [np.empty(0, dtype=np.uint32) for _ in range(bands)]
+        self._indexed = 0
+
+    def add(self, name, signature: np.ndarray) -> None:
+        """Add the signature of a trace."""
+        self.add_many([name], np.asarray(signature)[None, :])
+
+    def add_many(self, names: List[Any], signatures: np.ndarray) -> None:
+        """Add the signatures of several traces, one per row."""
+        signatures = np.asarray(signatures, dtype=np.uint32)
+        if signatures.ndim != 2 or signatures.shape[1] != self.num_perm or len(signatures) != len(names):
+            raise ValueError("Expected one signature of %u slots per name" % self.num_perm)
+
+        end = self._count + len(signatures)
+        if end > len(self._signatures):
+            self._grow(end)
+        self._signatures[self._count:end] = signatures
+        self._band_keys[self._count:end] = self._hash_bands(signatures)
+        self.names.extend(names)
+        self._count = end
+
+        # merging re-sorts everything, so only do it once the pending
+        # signatures make up a good share of the index
+        if self._count - self._indexed > max(4096, self._indexed >> 3):
+            self._merge_pending()
+
+    def query(self, signature: np.ndarray, k: int = 10) -> List[Tuple[Any, float]]:
+        """
+        Find the stored traces most similar to a signature.
+
+        Returns:
+            Up to k (name, estimated similarity) pairs, most similar first
+        """
+        signature = np.asarray(signature, dtype=np.uint32)
+        keys = self._hash_bands(signature[None, :])[0]
+
+        candidates = []
+        # keep the keys uint32, other types make searchsorted() convert the arrays
+        for band, key in enumerate(keys):
+            sorted_keys = self._sorted_keys[band]
+            start = np.searchsorted(sorted_keys, key, side="left")
+            end = np.searchsorted(sorted_keys, key, side="right")
+            candidates.append(self._sorted_ids[band][start:end])
+
+        # pending signatures aren't sorted yet, compare them directly
+        pending = self._band_keys[self._indexed:self._count]
+        candidates.append(np.flatnonzero((pending == keys).any(axis=1)) + self._indexed)
+
+        candidates = np.unique(np.concatenate(candidates).astype(np.int64))
+        if not len(candidates):
+            return []
+
+        similarities = (self._signatures[candidates] == signature).mean(axis=1)
+        best = np.argsort(-similarities, kind="stable")[:k]
+        return [(self.names[index], float(similarity))
+                for index, similarity in zip(candidates[best].tolist(), similarities[best].tolist())]
+
+    def _hash_bands(self, signatures: np.ndarray) -> np.ndarray:
+        """Return the 32-bit hash of every band of every signature."""
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return ((rows * self._band_multipliers).sum(axis=2) >> np.uint64(32)).astype(np.uint32)
+
+    def _grow(self, size: int) -> None:
+        """Grow the signature storage geometrically to hold 'size' signatures."""
+        capacity = max(size, 2 * len(self._signatures), 1024)
+        signatures = np.empty((capacity, self.num_perm), dtype=np.uint32)
+        signatures[:self._count] = self._signatures[:self._count]
+        band_keys = np.empty((capacity, self.bands), dtype=np.uint32)
+        band_keys[:self._count] = self._band_keys[:self._count]
+        self._signatures, self._band_keys = signatures, band_keys
+
+    def _merge_pending(self) -> None:
+        """Move the pending signatures into the sorted band arrays."""
+        ids = np.arange(self._indexed, self._count, dtype=np.uint32)
+        for band in range(self.bands):
+            keys = np.concatenate((self._sorted_keys[band], self._band_keys[self._indexed:self._count, band]))
+            order = np.argsort(keys, kind="stable")
+            self._sorted_keys[band] = keys[order]
+            self._sorted_ids[band] = np.concatenate((self._sorted_ids[band], ids))[order]
+        self._indexed = self._count
+
+    def __len__(self):
+        return self._count
+
+
+def _block_keys(key: Tuple[str, int], offsets: np.ndarray) -> np.ndarray:
+    """Return run-independent 64-bit keys of the blocks of a module, by its module_key()."""
+    path, checksum = key
+    digest = hashlib.blake2b(b"%s\0%d" % (path.encode(), checksum), digest_size=8).digest()
+    module_key = np.uint64(int.from_bytes(digest, "little"))
+
+    # splitmix64 finalizer, spreads the offsets over all 64 bits
+    keys = np.asarray(offsets, dtype=np.uint64) ^ module_key
+    keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return keys ^ (keys >> np.uint64(31))
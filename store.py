@@ -0,0 +1,384 @@
+"""
+SQLite-backed coverage store.
+
+Keeps the block coverage of many runs in a single SQLite database, so that
+questions like "which runs hit block X of module Y" and "which blocks did
+run Z cover" are answered through indexes rather than by re-parsing logs.
+
+Modules are normalized into their own table, keyed by (path, checksum).
+Each run's coverage of a module is split into chunks of CHUNK_BITS block
+offsets, each stored as a blob holding either the sorted 16-bit offsets
+within the chunk (sparse) or a bitmap of the whole chunk (dense). The
+inverse, the runs covering each block, is stored the same way in chunks of
+CHUNK_BITS run ids, so looking up a block reads one row per CHUNK_BITS runs.
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from aggregator import map_logs, summarize_file
+from coverage_set import ModuleCoverage, merge_coverage, module_coverages, module_key
+
+
+# block offsets (or run ids) covered by a single blob, and the size of a
+# dense blob
+CHUNK_SHIFT = 16
+CHUNK_BITS = 1 << CHUNK_SHIFT
+DENSE_BYTES = CHUNK_BITS // 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    checksum INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    UNIQUE (path, checksum)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    block_count INTEGER NOT NULL,
+    hit_count INTEGER NOT NULL
+);
+-- each run's blocks, clustered by module and block chunk
+CREATE TABLE IF NOT EXISTS coverage (
+    module_id INTEGER NOT NULL REFERENCES modules (id),
+    chunk INTEGER NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    blocks BLOB NOT NULL,
+    PRIMARY KEY (module_id, chunk, run_id)
+) WITHOUT ROWID;
+-- and 'blocks covered by run' is a range scan of this index
+CREATE INDEX IF NOT EXISTS coverage_by_run ON coverage (run_id);
+-- inverted index, the ids of the runs covering each block, so 'runs
+-- covering block' reads a single row per CHUNK_BITS runs
+CREATE TABLE IF NOT EXISTS postings (
+    module_id INTEGER NOT NULL REFERENCES modules (id),
+    block INTEGER NOT NULL,
+    run_chunk INTEGER NOT NULL,
+    runs BLOB NOT NULL,
+    PRIMARY KEY (module_id, block, run_chunk)
+) WITHOUT ROWID;
+"""
+
+
+class CoverageStore(object):
+    """
+    Persistent store of per-run block coverage.
+
+    Runs are buffered and written in batches, each batch in one transaction
+    of executemany() bulk inserts. The database runs in WAL mode, so readers
+    aren't blocked while a batch is being written.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        """
+        Args:
+            path: Path of the database file (created if missing)
+            batch_size: Number of runs written per transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.errors: Dict[str, str] = {}
+        self.skipped: List[str] = []  # names of runs that were stored already
+
+        # transactions are managed explicitly, see _write_batch()
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.create_function("merge_chunks", 2, _merge_chunks, deterministic=True)
+
+        self._module_ids = {}  # (path, checksum) -> module id
+        self._pending = []  # (name, coverages) of runs not written yet
+
+    # --------------------------------------------------------------------------
+    # Ingestion
+    # --------------------------------------------------------------------------
+
+    def add_run(self, name: str, coverages: Iterable[ModuleCoverage]) -> None:
+        """
+        Add the coverage of a run, written out once a batch has filled up.
+
+        Args:
+            name: Unique name of the run, eg. the path of its drcov log; runs
+                whose name is stored already are skipped (see 'skipped')
+            coverages: Per-module coverage of the run
+        """
+        # modules listed more than once in a log (eg. segments) share one key
+        grouped = {}
+        for coverage in coverages:
+            grouped.setdefault(coverage.key, []).append(coverage)
+
+        self._pending.append((name, [merge_coverage(group) for group in grouped.values()]))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_parser(self, name: str, parser) -> None:
+        """Add the coverage of a parsed drcov log."""
+        self.add_run(name, module_coverages(parser))
+
+    def add_logs(self, filepaths: Iterable[str], max_workers: Optional[int] = None) -> None:
+        """
+        Parse drcov logs in a process pool and add them as runs named by path.
+
+        Files failing to parse are skipped and recorded in 'errors'.
+
+        Args:
+            filepaths: drcov log paths
+            max_workers: Number of worker processes, 0 to parse in-process
+        """
+        for filepath, summaries in map_logs(summarize_file, filepaths, max_workers):
+            if isinstance(summaries, Exception):
+                self.errors[filepath] = str(summaries)
+                continue
+            self.add_run(filepath, summaries)
+        self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered runs."""
+        # runs stay pending until their batch is committed, so a failed
+        # batch can be retried rather than being lost
+        if self._pending:
+            self._write_batch(self._pending)
+            self._pending = []
+
+    def _write_batch(self, runs) -> None:
+        """Write a batch of runs in a single transaction."""
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # the write lock is held, so run ids can be handed out here
+            next_id = cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM runs").fetchone()[0]
+
+            runs, skipped = self._new_runs(cursor, runs)
+            run_rows, coverage_rows = [], []
+            block_keys, block_runs = [], []
+            for run_id, (name, coverages) in enumerate(runs, next_id):
+                run_rows.append((run_id, name, sum(c.block_count for c in coverages),
+                                 sum(c.hit_count for c in coverages)))
+                for coverage in coverages:
+                    module_id = self._module_id(cursor, coverage)
+                    coverage_rows.extend((module_id, chunk, run_id, blocks)
+                                         for chunk, blocks in _encode_chunks(coverage.offsets))
+                    block_keys.append((np.uint64(module_id) << np.uint64(32)) | coverage.offsets)
+                    block_runs.append(np.full(len(coverage.offsets), run_id, dtype=np.uint32))
+
+            cursor.executemany("INSERT INTO runs (id, name, block_count, hit_count) VALUES (?, ?, ?, ?)",
+                               run_rows)
+            cursor.executemany("INSERT INTO coverage (module_id, chunk, run_id, blocks) VALUES (?, ?, ?, ?)",
+                               coverage_rows)
+            # run ids only ever grow, so a batch usually extends the last chunk of a block
+            cursor.executemany("INSERT INTO postings (module_id, block, run_chunk, runs) VALUES (?, ?, ?, ?) "
+                               "ON CONFLICT (module_id, block, run_chunk) DO UPDATE SET runs = merge_chunks(runs, excluded.runs)",
+                               _encode_postings(block_keys, block_runs))
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            self._module_ids.clear()  # ids handed out in the batch are gone
+            raise
+
+        self.skipped.extend(skipped)
+
+    def _new_runs(self, cursor, runs):
+        """Split a batch into the runs to insert and the names already stored."""
+        names = list({name for name, _ in runs})
+        stored = set()
+        for start in range(0, len(names), 500):  # stay below SQLite's parameter limit
+            chunk = names[start:start + 500]
+            rows = cursor.execute("SELECT name FROM runs WHERE name IN (%s)" % ", ".join("?" * len(chunk)), chunk)
+            stored.update(name for name, in rows)
+
+        new_runs, skipped = [], []
+        for name, coverages in runs:
+            if name in stored:
+                skipped.append(name)
+            else:
+                stored.add(name)  # later duplicates within the batch are skipped too
+                new_runs.append((name, coverages))
+        return new_runs, skipped
+
+    def _module_id(self, cursor, coverage: ModuleCoverage) -> int:
+        """Return the id of a module, inserting it if it is new."""
+        key = coverage.key
+        module_id = self._module_ids.get(key)
+        if module_id is None:
+            cursor.execute("INSERT OR IGNORE INTO modules (path, checksum, filename, size) VALUES (?, ?, ?, ?)",
+                           (coverage.path, coverage.checksum, coverage.filename, coverage.size))
+            module_id = cursor.execute("SELECT id FROM modules WHERE path = ? AND checksum = ?", key).fetchone()[0]
+            self._module_ids[key] = module_id
+        return module_id
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+
+    def runs_covering(self, module, offset: int) -> List[str]:
+        """
+        Return the names of the runs covering a block.
+
+        Args:
+            module: Module path (matching every checksum), or an object with
+                'path' and 'checksum' attributes (eg. a ParsedModule)
+            offset: Module relative block offset
+        """
+        names = []
+        for module_id in self._lookup_modules(module):
+            rows = self.connection.execute(
+                "SELECT run_chunk, runs FROM postings WHERE module_id = ? AND block = ? ORDER BY run_chunk",
+                (module_id, offset))
+            run_ids = [_decode_chunk(run_chunk, runs) for run_chunk, runs in rows]
+            if run_ids:
+                names.extend(self._run_names(np.concatenate(run_ids).tolist()))
+        return names
+
+    def blocks_covered(self, name: str) -> Dict[Tuple[str, int], np.ndarray]:
+        """
+        Return the blocks covered by a run.
+
+        Returns:
+            Module (path, checksum) -> sorted covered block offsets
+        """
+        rows = self.connection.execute(
+            "SELECT modules.path, modules.checksum, coverage.chunk, coverage.blocks "
+            "FROM runs JOIN coverage ON coverage.run_id = runs.id JOIN modules ON modules.id = coverage.module_id "
+            "WHERE runs.name = ? ORDER BY coverage.module_id, coverage.chunk", (name,))
+
+        chunks = {}
+        for path, checksum, chunk, blocks in rows:
+            chunks.setdefault((path, checksum), []).append(_decode_chunk(chunk, blocks))
+        return {key: np.concatenate(offsets) for key, offsets in chunks.items()}
+
+    def run_names(self) -> List[str]:
+        """Return the names of all stored runs, in insertion order."""
+        return [name for name, in self.connection.execute("SELECT name FROM runs ORDER BY id")]
+
+    def _run_names(self, run_ids: List[int]) -> List[str]:
+        """Return the names of the given runs, ordered by id."""
+        names = []
+        for start in range(0, len(run_ids), 500):  # stay below SQLite's parameter limit
+            chunk = run_ids[start:start + 500]
+            rows = self.connection.execute(
+                "SELECT name FROM runs WHERE id IN (%s) ORDER BY id" % ", ".join("?" * len(chunk)), chunk)
+            names.extend(name for name, in rows)
+        return names
+
+    def _lookup_modules(self, module) -> List[int]:
+        """Return the ids of the modules matching a path or module object."""
+        if isinstance(module, str):
+            rows = self.connection.execute("SELECT id FROM modules WHERE path = ?", (module,))
+        else:
+            rows = self.connection.execute("SELECT id FROM modules WHERE path = ? AND checksum = ?",
+                                           module_key(module))
+        return [module_id for module_id, in rows]
+
+    def close(self) -> None:
+        """Write all buffered runs and close the database."""
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0] + len(self._pending)
+
+
+# ------------------------------------------------------------------------------
+# Chunk Encoding
+# ------------------------------------------------------------------------------
+
+def _encode_chunks(offsets: np.ndarray):
+    """Yield (chunk, blob) for the sorted unique block offsets of a module."""
+    offsets = np.asarray(offsets, dtype=np.uint32)
+    chunks, starts = np.unique(offsets >> CHUNK_SHIFT, return_index=True)
+    ends = np.append(starts[1:], len(offsets))
+
+    for chunk, start, end in zip(chunks.tolist(), starts.tolist(), ends.tolist()):
+        yield chunk, _encode_low(offsets[start:end] & (CHUNK_BITS - 1))
+
+
+def _encode_postings(block_keys: List[np.ndarray], block_runs: List[np.ndarray]):
+    """
+    Yield (module_id, block, run_chunk, blob) postings rows of a batch.
+
+    Args:
+        block_keys: Per coverage, module_id << 32 | offset of its blocks
+        block_runs: Per coverage, the run id of each of its blocks
+    """
+    if not block_keys:
+        return
+
+    # coverages come in run id order, so a stable sort keeps the run ids of
+    # each block sorted
+    keys, run_ids = np.concatenate(block_keys), np.concatenate(block_runs)
+    order = np.argsort(keys, kind="stable")
+    keys, run_ids = keys[order], run_ids[order]
+    run_chunks = run_ids >> CHUNK_SHIFT
+
+    # one row per block and chunk of run ids
+    starts = np.flatnonzero(np.concatenate(([True], (keys[1:] != keys[:-1]) | (run_chunks[1:] != run_chunks[:-1]))))
+    ends = np.append(starts[1:], len(keys))
+    module_ids = (keys[starts] >> np.uint64(32)).tolist()
+    blocks = (keys[starts] & np.uint64(0xFFFFFFFF)).tolist()
+    low = run_ids & (CHUNK_BITS - 1)
+    sparse = low.astype("<u2").tobytes()
+
+    for module_id, block, run_chunk, start, end in zip(module_ids, blocks, run_chunks[starts].tolist(),
+                                                         starts.tolist(), ends.tolist()):
+        if (end - start) * 2 < DENSE_BYTES:
+            yield module_id, block, run_chunk, sparse[start * 2:end * 2]
+        else:
+            yield module_id, block, run_chunk, _encode_low(low[start:end])
+
+
+def _encode_low(low: np.ndarray) -> bytes:
+    """Encode the sorted unique 16-bit low parts of one chunk as a blob."""
+    # sparse blobs are always shorter than dense ones, which tells them apart
+    if len(low) * 2 < DENSE_BYTES:
+        return low.astype("<u2").tobytes()
+
+    bits = np.zeros(CHUNK_BITS, dtype=bool)
+    bits[low] = True
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def _decode_low(blob: bytes) -> np.ndarray:
+    """Return the sorted 16-bit low parts stored in a chunk blob."""
+    if len(blob) == DENSE_BYTES:
+        return np.flatnonzero(np.unpackbits(np.frombuffer(blob, dtype=np.uint8), bitorder="little"))
+    return np.frombuffer(blob, dtype="<u2")
+
+
+def _decode_chunk(chunk: int, blob: bytes) -> np.ndarray:
+    """Return the block offsets (or run ids) stored in a chunk blob."""
+    return (np.uint32(chunk) << np.uint32(CHUNK_SHIFT)) | _decode_low(blob).astype(np.uint32)
+
+
+def _merge_chunks(blob: bytes, other: bytes) -> bytes:
+    """SQL function merge_chunks(): the union of two blobs of the same chunk."""
+    # new runs get higher ids than the stored ones, so sparse blobs are
+    # usually merged by appending
+    if (len(blob) + len(other) < DENSE_BYTES and len(blob) != DENSE_BYTES and len(other) != DENSE_BYTES
+            and (not blob or not other or int.from_bytes(blob[-2:], "little") < int.from_bytes(other[:2], "little"))):
+        return blob + other
+    if len(blob) + len(other) < DENSE_BYTES:
+        return _encode_low(np.union1d(_decode_low(blob), _decode_low(other)))
+
+    # set the bits of both blobs instead of sorting their union
+    bits = np.zeros(CHUNK_BITS, dtype=bool)
+    for part in (blob, other):
+        if len(part) == DENSE_BYTES:
+            bits |= np.unpackbits(np.frombuffer(part, dtype=np.uint8), bitorder="little").view(bool)
+        else:
+            bits[np.frombuffer(part, dtype="<u2")] = True
+
+    if np.count_nonzero(bits) * 2 < DENSE_BYTES:
+        return np.flatnonzero(bits).astype("<u2").tobytes()
+    return np.packbits(bits, bitorder="little").tobytes()
@@ -0,0 +1,35 @@
+import os
+import struct
+import sys
+
+import pytest
+
+# the parser modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+MODULE_COUNT = 3
+
+
+def drcov_header(block_count, text=False):
+    """Return the header and module table of a small version 2 drcov log."""
+    lines = [b"DRCOV VERSION: 2", b"DRCOV FLAVOR: drcov",
+             b"Module Table: version 2, count %d" % MODULE_COUNT,
+             b"Columns: id, base, end, entry, path"]
+    for i in range(MODULE_COUNT):
+        base = 0x400000 + i * 0x100000
+        lines.append(b"%3d, 0x%016x, 0x%016x, 0x%016x, /usr/lib/lib%d.so" % (i, base, base + 0x80000, base, i))
+    lines.append(b"BB Table: %d bbs" % block_count)
+    if text:
+        lines.append(b"module id, start, size:")
+    return b"\n".join(lines) + b"\n"
+
+
+@pytest.fixture
+def drcov_log(tmp_path):
+    """Factory writing a binary drcov log of (offset, size, mod_id) blocks."""
+    def make(name, blocks):
+        path = tmp_path / name
+        path.write_bytes(drcov_header(len(blocks)) + b"".join(struct.pack("<IHH", *bb) for bb in blocks))
+        return str(path)
+    return make
@@ -0,0 +1,68 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import drcov
+from conftest import drcov_header
+from drcov import DrcovAddressIndex, DrcovParser
+
+
+def module(mod_id, base, end):
+    return SimpleNamespace(id=mod_id, base=base, end=end, size=end - base)
+
+
+def innermost(modules, address):
+    """Brute force: the smallest module covering the address, the first one on a tie."""
+    covering = [m for m in modules if m.base <= address < m.end]
+    return min(covering, key=lambda m: m.size) if covering else None
+
+
+def test_nested_and_overlapping_modules():
+    modules = [
+        module(0, 0x1000, 0x9000),  # outer mapping
+        module(1, 0x2000, 0x3000),  # nested segment
+        module(2, 0x2800, 0x2900),  # nested in the segment
+        module(3, 0x8000, 0xa000),  # overlaps the end of the mapping
+        module(4, 0x2000, 0x3000),  # same range as 1, loses the tie
+        module(5, 0x0, 0x0),        # no addresses (v1 table)
+    ]
+    index = DrcovAddressIndex(modules)
+
+    expected = {0xfff: None, 0x1000: 0, 0x1fff: 0, 0x2000: 1, 0x27ff: 1, 0x2800: 2, 0x28ff: 2, 0x2900: 1,
+                0x3000: 0, 0x7fff: 0, 0x8000: 3, 0x9000: 3, 0x9fff: 3, 0xa000: None}
+    for address, mod_id in expected.items():
+        found = index.lookup(address)
+        assert (found.id if found else None) == mod_id, hex(address)
+    assert index.lookup_ids(list(expected)).tolist() == [-1 if m is None else m for m in expected.values()]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_layouts_match_brute_force(seed):
+    rng = random.Random(seed)
+    modules = []
+    for mod_id in range(40):
+        base = rng.randrange(0, 0x10000, 0x10)
+        modules.append(module(mod_id, base, base + rng.choice([0x10, 0x100, 0x1000, 0x4000])))
+    index = DrcovAddressIndex(modules)
+
+    addresses = [rng.randrange(0, 0x15000) for _ in range(2000)] + [m.base for m in modules] + [m.end for m in modules]
+    expected = [innermost(modules, address) for address in addresses]
+    assert [index.lookup(address) for address in addresses] == expected
+    assert index.lookup_ids(addresses).tolist() == [m.id if m else -1 for m in expected]
+
+
+def test_lookup_ids_without_numpy(monkeypatch):
+    modules = [module(0, 0x1000, 0x9000), module(7, 0x2000, 0x3000)]
+    monkeypatch.setattr(drcov, "np", None)
+    index = DrcovAddressIndex(modules)
+    assert index.lookup_ids([0x0, 0x1000, 0x2000, 0x3000, 0x9000]) == [-1, 0, 7, 0, -1]
+
+
+def test_parser_resolves_addresses():
+    parser = DrcovParser(data=drcov_header(0))
+    assert parser.module_for_address(0x500010).path == "/usr/lib/lib1.so"
+    assert parser.module_for_address(0x480000) is None
+    addresses = np.array([0x400000, 0x47ffff, 0x480000, 0x600000, 0x680000], dtype=np.uint64)
+    assert parser.modules_for_addresses(addresses).tolist() == [0, 0, -1, 2, -1]
@@ -0,0 +1,15 @@
+import pytest
+
+from aggregator import map_logs, summarize_file
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_map_logs_yields_failures_in_place(drcov_log, tmp_path, max_workers):
+    paths = [drcov_log("a.drcov", [(0x10, 4, 0), (0x20, 8, 1)]), str(tmp_path / "missing.drcov"),
+             drcov_log("b.drcov", [(0x30, 2, 2)])]
+
+    results = list(map_logs(summarize_file, paths, max_workers))
+    assert [path for path, _ in results] == paths
+    assert isinstance(results[1][1], OSError)
+    assert [coverage.offsets.tolist() for coverage in results[0][1]] == [[0x10], [0x20]]
+    assert [coverage.offsets.tolist() for coverage in results[2][1]] == [[0x30]]
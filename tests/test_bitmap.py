@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from bitmap import ModuleBitmap
+
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_contains_matches_the_offsets(dense):
+    bitmap = ModuleBitmap.from_offsets([3, 8, 100, 4095], 4096, dense=dense)
+    probes = np.array([0, 3, 4, 8, 99, 100, 4095, 4096, 70000], dtype=np.uint32)
+
+    assert bitmap.contains(probes).tolist() == [False, True, False, True, False, True, True, False, False]
+    assert [offset in bitmap for offset in probes.tolist()] == bitmap.contains(probes).tolist()
+
+
+def test_update_grows_and_switches_to_dense():
+    bitmap = ModuleBitmap.from_offsets([], 4096)
+    bitmap.update([10, 5])
+    assert not bitmap.is_dense and bitmap.offsets().tolist() == [5, 10]
+
+    # 4096 bits are 512 bytes, smaller than 200 sparse offsets
+    bitmap.update(np.arange(0, 800, 4))
+    assert bitmap.is_dense and bitmap.nbytes == 512
+
+    bitmap.update([5000])
+    assert bitmap.size == 5001 and bitmap.nbytes == 626
+    assert bitmap.offsets().tolist() == sorted(set(range(0, 800, 4)) | {5, 10, 5000})
+
+
+OPERATIONS = [
+    ("union", lambda a, b: a | b),
+    ("intersection", lambda a, b: a & b),
+    ("difference", lambda a, b: a - b),
+    ("symmetric_difference", lambda a, b: a ^ b),
+]
+
+
+@pytest.mark.parametrize("name, expected", OPERATIONS)
+@pytest.mark.parametrize("dense_a", [False, True])
+@pytest.mark.parametrize("dense_b", [False, True])
+def test_set_operations_match_python_sets(name, expected, dense_a, dense_b):
+    rng = np.random.default_rng(len(name))
+    a_offsets = set(rng.integers(0, 5000, 300).tolist())
+    b_offsets = set(rng.integers(0, 6000, 300).tolist())
+    a = ModuleBitmap.from_offsets(list(a_offsets), 5000, dense=dense_a)
+    b = ModuleBitmap.from_offsets(list(b_offsets), 6000, dense=dense_b)
+
+    result = getattr(a, name)(b)
+    assert result.offsets().tolist() == sorted(expected(a_offsets, b_offsets))
+    assert result.size == 6000
+    assert result == expected(a, b)
+
+
+def test_representation_follows_density():
+    # 8192 offsets fit a 1 KiB bitmap, so 256 sparse offsets are the break even
+    assert not ModuleBitmap.from_offsets(range(0, 8192, 32), 8192).is_dense
+    assert ModuleBitmap.from_offsets(range(0, 8192, 31), 8192).is_dense
+    assert ModuleBitmap.from_offsets(range(0, 8192, 31), 8192).nbytes == 1024
+
+    dense = ModuleBitmap.from_offsets(range(0, 4096, 2), 8192)
+    sparse = ModuleBitmap.from_offsets(range(0, 4096, 64), 8192)
+    assert dense.is_dense and not sparse.is_dense
+
+    # results switch representation when their density changes
+    assert not (dense & sparse).is_dense
+    assert (dense | sparse).is_dense
+    assert not (dense - ModuleBitmap.from_offsets(range(64, 4096, 2), 8192)).is_dense
+    assert (dense ^ ModuleBitmap.from_offsets(range(1, 4096, 2), 8192)).popcount() == 4096
+
+
+def test_from_offsets_sorts_and_grows():
+    bitmap = ModuleBitmap.from_offsets([9, 3, 9, 100], 16)
+    assert bitmap.offsets().tolist() == [3, 9, 100]
+    assert bitmap.size == 101 and len(bitmap) == 3
+
+    forced = ModuleBitmap.from_offsets([9, 3], 1 << 20, dense=True)
+    assert forced.is_dense and forced.nbytes == 1 << 17 and forced.offsets().tolist() == [3, 9]
@@ -0,0 +1,55 @@
+import os
+
+from cache import CoverageCache
+from drcov import DrcovParser
+
+
+def test_parse_builds_the_content_key_once(drcov_log, tmp_path, monkeypatch):
+    path = drcov_log("a.drcov", [(0x10, 4, 0), (0x20, 8, 1), (0x10, 4, 0)])
+    cache = CoverageCache(str(tmp_path / "cache"), hash_content=True)
+
+    calls = []
+    make_key = cache.make_key
+    monkeypatch.setattr(cache, "make_key", lambda filepath: calls.append(filepath) or make_key(filepath))
+
+    parsed = DrcovParser(path, cache=cache)
+    assert len(calls) == 1
+
+    cached = DrcovParser(path, cache=cache)
+    assert len(calls) == 2
+    assert bytes(cached._raw_basic_blocks) == bytes(parsed._raw_basic_blocks)
+
+
+def test_load_refreshes_the_parser_state(drcov_log, tmp_path):
+    path = drcov_log("a.drcov", [(0x10, 4, 0), (0x20, 8, 1), (0x10, 4, 0)])
+    cache = CoverageCache(str(tmp_path / "cache"))
+    DrcovParser(path, cache=cache)
+
+    # a header-only parser has no blocks until the cache fills them in
+    parser = DrcovParser(path, blocks=False)
+    assert len(parser.offsets) == 0
+    assert cache.load(parser)
+
+    assert parser.offsets.tolist() == [0x10, 0x20, 0x10]
+    assert parser.mod_ids.tolist() == [0, 1, 0]
+    assert [module.filename for module in parser.get_modules()] == ["lib0.so", "lib1.so", "lib2.so"]
+    assert parser.get_module("lib1", fuzzy=True).id == 1
+    assert parser.module_for_address(0x500010).id == 1
+    assert [block.offset for block in parser.get_blocks_by_module("lib0.so")] == [0x10, 0x10]
+    assert dict(parser.get_hit_count_map_by_module("lib0.so").items()) == {0x10: 2}
+
+
+def test_corrupt_entry_leaves_the_parser_alone(drcov_log, tmp_path):
+    path = drcov_log("a.drcov", [(0x10, 4, 0), (0x20, 8, 1)])
+    cache = CoverageCache(str(tmp_path / "cache"))
+    DrcovParser(path, cache=cache)
+
+    # cut the sidecar short, so its arrays run past the end of the file
+    sidecar = cache._sidecar_path(cache.make_key(path))
+    with open(sidecar, "r+b") as f:
+        f.truncate(os.path.getsize(sidecar) - 16)
+
+    parser = DrcovParser(path, blocks=False)
+    assert not cache.load(parser)
+    assert not os.path.exists(sidecar)
+    assert parser.bb_table_count == 2 and len(parser._raw_basic_blocks) == 0
@@ -0,0 +1,96 @@
+import bz2
+import gzip
+import lzma
+import struct
+
+import pytest
+
+import drcov
+from conftest import drcov_header
+from drcov import DrcovParser
+
+
+BLOCKS = [(0x10, 4, 0), (0x20, 8, 1), (0x10, 4, 0)]
+
+
+def text_log(table_position=None):
+    """Return an ascii table log, padded so its table starts at table_position."""
+    header = drcov_header(len(BLOCKS), text=True)
+    if table_position is not None:
+        padding = table_position - header.index(b"module id") - 1
+        header = header.replace(b"/usr/lib/lib0.so", b"/usr/lib/" + b"x" * padding + b"/lib0.so")
+    return header + b"".join(b"module[%3u]: 0x%016x, %3u\n" % (mod_id, offset, size)
+                             for offset, size, mod_id in BLOCKS)
+
+
+def binary_log():
+    return drcov_header(len(BLOCKS)) + b"".join(struct.pack("<IHH", *bb) for bb in BLOCKS)
+
+
+def zstd_compress(data):
+    if drcov.zstd is None:
+        pytest.skip("no zstd module available")
+    return drcov.zstd.compress(data)
+
+
+COMPRESSORS = [gzip.compress, bz2.compress, lzma.compress, zstd_compress]
+
+
+def blocks_of(parser):
+    return [(bb.offset, bb.size, bb.mod_id) for bb in parser._raw_basic_blocks]
+
+
+# the table header line starts right before the end of the first 8 KiB
+# buffer of the file and decompression streams
+@pytest.mark.parametrize("table_position", range(8180, 8196))
+@pytest.mark.parametrize("compress", [None, gzip.compress])
+def test_ascii_table_detected_at_buffer_boundary(tmp_path, table_position, compress):
+    data = text_log(table_position)
+    assert data.index(b"module id") == table_position
+
+    path = tmp_path / "boundary.drcov"
+    path.write_bytes(compress(data) if compress else data)
+    parser = DrcovParser(str(path))
+    assert not parser.bb_table_is_binary
+    assert blocks_of(parser) == BLOCKS
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+@pytest.mark.parametrize("compress", [None, gzip.compress])
+def test_truncated_binary_table_raises(drcov_log, mmap, compress):
+    path = drcov_log("truncated.drcov", BLOCKS)
+    with open(path, "rb") as f:
+        data = f.read()[:-3]
+    with open(path, "wb") as f:
+        f.write(compress(data) if compress else data)
+
+    with pytest.raises(ValueError, match="Truncated BB table"):
+        DrcovParser(path, mmap=mmap)
+    with pytest.raises(ValueError, match="Truncated BB table"):
+        list(DrcovParser.iter_blocks(path))
+
+
+@pytest.mark.parametrize("log", [binary_log, text_log])
+@pytest.mark.parametrize("compress", COMPRESSORS)
+def test_compressed_logs_parse_like_uncompressed_ones(tmp_path, log, compress):
+    data = log()
+    path = tmp_path / "compressed.drcov"
+    path.write_bytes(compress(data))
+    expected = DrcovParser(data=data)
+
+    # mmap=True falls back to streaming for compressed files
+    for parser in (DrcovParser(str(path)), DrcovParser(str(path), mmap=True), DrcovParser(data=compress(data))):
+        assert blocks_of(parser) == BLOCKS
+        assert parser.bb_table_is_binary == expected.bb_table_is_binary
+        assert [m.path for m in parser.get_modules()] == [m.path for m in expected.get_modules()]
+
+    chunks = list(DrcovParser.iter_blocks(str(path), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+
+def test_zstd_log_without_zstd_module(tmp_path, monkeypatch):
+    path = tmp_path / "compressed.drcov"
+    path.write_bytes(b"\x28\xb5\x2f\xfd" + bytes(16))
+    monkeypatch.setattr(drcov, "zstd", None)
+    with pytest.raises(ValueError, match="no zstd module"):
+        DrcovParser(str(path))
@@ -0,0 +1,42 @@
+import numpy as np
+
+from frontier import CoverageFrontier
+
+
+def test_ingest_returns_only_new_blocks(drcov_log):
+    frontier = CoverageFrontier()
+
+    first = frontier.ingest(drcov_log("a.drcov", [(0x10, 4, 0), (0x10, 4, 0), (0x80, 2, 2)]))
+    assert [(c.path, c.offsets.tolist(), c.counts.tolist()) for c in first] == \
+        [("/usr/lib/lib0.so", [0x10], [2]), ("/usr/lib/lib2.so", [0x80], [1])]
+
+    second = frontier.ingest(drcov_log("b.drcov", [(0x10, 4, 0), (0x5000, 8, 0), (0x20, 1, 1)]))
+    assert [(c.path, c.offsets.tolist()) for c in second] == \
+        [("/usr/lib/lib0.so", [0x5000]), ("/usr/lib/lib1.so", [0x20])]
+
+    assert frontier.ingest(drcov_log("c.drcov", [(0x5000, 8, 0)])) == []
+    assert (frontier.log_count, frontier.block_count) == (3, 4)
+
+
+def test_blocks_are_tracked_per_module(drcov_log):
+    frontier = CoverageFrontier()
+
+    # lib0 and lib1 have no blocks, so lib2 is the only summarized module
+    assert [c.path for c in frontier.ingest(drcov_log("a.drcov", [(0x10, 4, 2)]))] == ["/usr/lib/lib2.so"]
+    parsed = frontier.registry.modules
+    assert [frontier.is_covered(module, 0x10) for module in parsed] == [False, False, True]
+
+    new = frontier.ingest(drcov_log("b.drcov", [(0x10, 4, 0), (0x10, 4, 2)]))
+    assert [c.path for c in new] == ["/usr/lib/lib0.so"]
+
+
+def test_dense_coverage_switches_to_a_packed_bitmap(drcov_log):
+    frontier = CoverageFrontier()
+    offsets = list(range(0, 0x80000, 16))
+    frontier.ingest(drcov_log("a.drcov", [(offset, 4, 1) for offset in offsets[::2]]))
+    new = frontier.ingest(drcov_log("b.drcov", [(offset, 4, 1) for offset in offsets]))
+
+    assert np.array_equal(new[0].offsets, offsets[1::2])
+    covered = frontier._covered[1]
+    assert covered.is_dense and covered.nbytes == 0x80000 // 8
+    assert covered.popcount() == len(offsets) == frontier.block_count
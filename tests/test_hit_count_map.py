@@ -0,0 +1,26 @@
+from array import array
+
+import numpy as np
+import pytest
+
+from drcov import DrcovHitCountMap
+
+
+@pytest.mark.parametrize("columns", [
+    lambda values, typecode: np.array(values, dtype={"I": np.uint32, "Q": np.int64, "H": np.uint16}[typecode]),
+    lambda values, typecode: array(typecode, values),
+], ids=["numpy", "array"])
+def test_mapping_interface(columns):
+    offsets, counts = [0x10, 0x40, 0x1000], [3, 1, 7]
+    hits = DrcovHitCountMap(columns(offsets, "I"), columns(counts, "Q"), columns([4, 2, 8], "H"))
+
+    assert list(hits) == offsets
+    assert list(hits.items()) == list(zip(offsets, counts))
+    assert list(hits.values()) == counts
+    assert all(type(offset) is int and type(count) is int for offset, count in hits.items())
+    assert len(hits.items()) == 3 and (0x40, 1) in hits.items() and (0x40, 2) not in hits.items()
+
+    assert hits[0x1000] == 7
+    for missing in [0, 0x11, 0x2000, -1, 1 << 40]:
+        assert hits.get(missing) is None
+        assert missing not in hits
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from hll import HyperLogLog, ModuleSketches
+
+
+@pytest.mark.parametrize("precision, count", [(10, 500), (10, 20000), (10, 200000), (14, 100000)])
+def test_relative_error_matches_the_standard_error(precision, count):
+    # disjoint offset ranges make independent sketches
+    errors = []
+    for trial in range(20):
+        sketch = HyperLogLog(precision)
+        sketch.add(np.arange(trial * count, (trial + 1) * count, dtype=np.uint32))
+        errors.append(sketch.count() / count - 1)
+
+    errors = np.array(errors)
+    # the rms error of 20 trials stays well within 1.5 standard errors, and
+    # no single estimate is off by more than 4
+    assert np.sqrt(np.mean(errors ** 2)) < 1.5 * sketch.error
+    assert np.abs(errors).max() < 4 * sketch.error
+
+
+def test_small_counts_are_nearly_exact():
+    sketch = HyperLogLog(14)
+    assert sketch.count() == 0
+    sketch.add([7])
+    assert round(sketch.count()) == 1
+    sketch.add(np.arange(300))
+    assert abs(sketch.count() - 300) < 3
+
+
+def test_duplicates_and_merges_count_once():
+    left, right, union = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    left.add(np.arange(0, 30000))
+    left.add(np.arange(0, 30000))
+    right.add(np.arange(20000, 50000))
+    union.add(np.arange(0, 50000))
+
+    merged = left.copy()
+    merged.merge(right)
+    assert np.array_equal(merged.registers, union.registers)
+    assert abs(merged.count() / 50000 - 1) < 4 * merged.error
+
+    with pytest.raises(ValueError):
+        merged.merge(HyperLogLog(10))
+
+
+def test_module_sketches_round_trip(drcov_log):
+    sketches = ModuleSketches(precision=8)
+    sketches.add_logs([drcov_log("a.drcov", [(0x10, 4, 0), (0x20, 4, 2)]),
+                       drcov_log("b.drcov", [(0x10, 4, 0), (0x30, 4, 0)])], max_workers=0)
+    assert {key: round(count) for key, count in sketches.counts().items()} == \
+        {("/usr/lib/lib0.so", 0): 2, ("/usr/lib/lib2.so", 0): 1}
+
+    restored = ModuleSketches.from_bytes(sketches.to_bytes())
+    assert restored.counts() == sketches.counts()
+    assert restored.precision == 8
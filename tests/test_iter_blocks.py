@@ -0,0 +1,61 @@
+import struct
+
+import numpy as np
+import pytest
+
+import drcov
+from conftest import drcov_header
+from drcov import DRCOV_BB_DTYPE, DrcovParser
+
+
+BLOCKS = [(0x10 * index, index % 50 + 1, index % 3) for index in range(10)]
+
+
+def write_log(tmp_path, blocks, text=False, count=None):
+    count = len(blocks) if count is None else count
+    if text:
+        table = b"".join(b"module[%3u]: 0x%016x, %3u\n" % (mod_id, offset, size) for offset, size, mod_id in blocks)
+    else:
+        table = b"".join(struct.pack("<IHH", *bb) for bb in blocks)
+    path = tmp_path / "run.drcov"
+    path.write_bytes(drcov_header(count, text=text) + table)
+    return str(path)
+
+
+def as_tuples(chunk):
+    return [(int(bb["offset"]), int(bb["size"]), int(bb["mod_id"])) for bb in chunk]
+
+
+@pytest.mark.parametrize("text", [False, True])
+@pytest.mark.parametrize("chunk_size, lengths", [(1, [1] * 10), (3, [3, 3, 3, 1]), (5, [5, 5]), (64, [10])])
+def test_chunks_hold_the_table_in_order(tmp_path, text, chunk_size, lengths):
+    path = write_log(tmp_path, BLOCKS, text)
+    chunks = list(DrcovParser.iter_blocks(path, chunk_size=chunk_size))
+
+    assert [len(chunk) for chunk in chunks] == lengths
+    assert all(chunk.dtype == DRCOV_BB_DTYPE for chunk in chunks)
+    assert as_tuples(np.concatenate(chunks)) == BLOCKS
+    assert np.array_equal(np.concatenate(chunks), DrcovParser(path).bb_table)
+
+
+def test_empty_table_yields_nothing(tmp_path):
+    assert list(DrcovParser.iter_blocks(write_log(tmp_path, []))) == []
+
+
+@pytest.mark.parametrize("text", [False, True])
+def test_chunks_without_numpy(tmp_path, monkeypatch, text):
+    path = write_log(tmp_path, BLOCKS, text)
+    monkeypatch.setattr(drcov, "np", None)
+
+    chunks = list(DrcovParser.iter_blocks(path, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert [(bb.offset, bb.size, bb.mod_id) for chunk in chunks for bb in chunk] == BLOCKS
+
+
+def test_truncated_text_table_reports_table_counts(tmp_path):
+    path = write_log(tmp_path, BLOCKS, text=True, count=12)
+    chunks = DrcovParser.iter_blocks(path, chunk_size=4)
+    assert len(next(chunks)) == 4
+    assert len(next(chunks)) == 4
+    with pytest.raises(ValueError, match="expected 12 entries, found 10"):
+        next(chunks)
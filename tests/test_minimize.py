@@ -0,0 +1,30 @@
+import numpy as np
+
+from coverage_set import ModuleCoverage
+from minimize import CorpusMinimizer
+
+
+def coverage(path, offsets):
+    offsets = np.array(offsets, dtype=np.uint32)
+    return ModuleCoverage(path, path.rsplit("/", 1)[-1], 0, 0x1000, offsets,
+                          np.ones(len(offsets), dtype=np.int64), np.full(len(offsets), 4, dtype=np.uint16))
+
+
+def test_minimize_covers_the_corpus_by_gain_per_cost():
+    minimizer = CorpusMinimizer()
+    minimizer.add("big", [coverage("/lib/a.so", range(0, 0x1000, 4))], cost=10)
+    minimizer.add("left", [coverage("/lib/a.so", range(0, 0x800, 4))], cost=1)
+    minimizer.add("right", [coverage("/lib/a.so", range(0x800, 0x1000, 4)), coverage("/lib/b.so", [8])], cost=1)
+    minimizer.add("subset", [coverage("/lib/a.so", [0, 4]), coverage("/lib/b.so", [8])], cost=1)
+
+    assert minimizer.minimize() == ["right", "left"]
+
+
+def test_minimize_skips_inputs_without_new_blocks():
+    minimizer = CorpusMinimizer()
+    minimizer.add("first", [coverage("/lib/a.so", [4, 8])])
+    minimizer.add("duplicate", [coverage("/lib/a.so", [4, 8])])
+    minimizer.add("empty", [])
+    minimizer.add("beyond", [coverage("/lib/a.so", [0x2000])])
+
+    assert minimizer.minimize() == ["first", "beyond"]
@@ -0,0 +1,24 @@
+import pytest
+
+import drcov
+from drcov import DrcovParser
+
+
+BLOCKS = [(0x30, 4, 1), (0x10, 4, 0), (0x20, 8, 1), (0x10, 4, 0), (0x50, 2, 2)]
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_blocks_by_module_are_indexed_on_demand(drcov_log, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(drcov, "np", None)
+    parser = DrcovParser(drcov_log("a.drcov", BLOCKS))
+    assert parser._bb_module_order is None
+
+    # blocks of a module come back in log order
+    assert [block.offset for block in parser.get_blocks_by_module("lib1.so")] == [0x30, 0x20]
+    assert [block.offset for block in parser.get_blocks_by_module("lib0.so")] == [0x10, 0x10]
+    assert [block.offset for block in parser.get_blocks_by_module("lib2.so")] == [0x50]
+
+    order = parser._bb_module_order
+    assert list(order) == [1, 3, 0, 2, 4]
+    assert order.itemsize == 4
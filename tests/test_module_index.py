@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from base import ParsedModule
+from drcov import DrcovModuleIndex
+
+
+FILENAMES = ["libfoo.so", "LIBBAR.so.1", "libfoo.so", "ntdll.dll", "foobar.exe", "bar", "libc.so.6", "glibc.so"]
+
+
+def make_modules(filenames):
+    return [ParsedModule(id=i, filename=filename, base=0, end=0, size=0, path="/lib/" + filename)
+            for i, filename in enumerate(filenames)]
+
+
+def first_match(modules, needle):
+    return next((module for module in modules if needle in module.filename.lower()), None)
+
+
+@pytest.mark.parametrize("scan_lookups", [0, 1000])
+def test_find_substring_returns_the_first_match(monkeypatch, scan_lookups):
+    monkeypatch.setattr(DrcovModuleIndex, "SCAN_LOOKUPS", scan_lookups)
+    modules = make_modules(FILENAMES)
+    index = DrcovModuleIndex(modules)
+
+    for needle in ["libfoo", "bar", "libc.so", "so", ".dll", "", "zzz", "libbar.so.1"]:
+        assert index.find_substring(needle) is first_match(modules, needle), needle
+    assert (index._suffixes is None) == bool(scan_lookups)
+
+
+def test_find_substring_switches_to_the_suffix_list():
+    rng = random.Random(0)
+    filenames = ["".join(rng.choice("abc.") for _ in range(rng.randrange(1, 8))) for _ in range(200)]
+    modules = make_modules(filenames)
+    index = DrcovModuleIndex(modules)
+
+    needles = ["".join(rng.choice("abc.") for _ in range(rng.randrange(0, 4))) for _ in range(300)]
+    for needle in needles:
+        assert index.find_substring(needle) is first_match(modules, needle), needle
+    assert index._suffixes is not None
+
+
+def test_range_minimum_table():
+    rng = random.Random(1)
+    positions = [rng.randrange(100) for _ in range(77)]
+    table = DrcovModuleIndex._build_min_table(positions)
+
+    for start in range(len(positions)):
+        for end in range(start + 1, len(positions) + 1):
+            level = (end - start).bit_length() - 1
+            row = table[level]
+            assert min(row[start], row[end - (1 << level)]) == min(positions[start:end])
+
+
+def test_strict_lookups_keep_the_first_duplicate():
+    modules = make_modules(FILENAMES)
+    index = DrcovModuleIndex(modules)
+    assert index.by_filename["libfoo.so"] is modules[0]
+    assert index.by_id[3] is modules[3]
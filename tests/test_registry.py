@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from coverage_set import module_key
+from registry import UNKNOWN_MODULE, ModuleRegistry
+
+
+def module(mod_id, path, checksum=0, size=0x1000, timestamp=0):
+    return SimpleNamespace(id=mod_id, path=path, checksum=checksum, size=size, timestamp=timestamp)
+
+
+def log(*modules):
+    return SimpleNamespace(get_modules=lambda: list(modules))
+
+
+def test_modules_are_matched_by_the_shared_module_key():
+    registry = ModuleRegistry()
+    first = registry.remap(log(module(0, "/lib/a.so"), module(1, "/lib/b.so", checksum=7)))
+
+    # other ids, sizes and timestamps; segments of a module share its key
+    second = registry.remap(log(module(2, "/lib/b.so", checksum=7, timestamp=5),
+                                module(0, "/lib/a.so", size=0x2000), module(1, "/lib/a.so", size=0x400),
+                                module(4, "/lib/b.so", checksum=8)))
+
+    assert first.tolist() == [0, 1]
+    assert second.tolist() == [0, 0, 1, UNKNOWN_MODULE, 2]
+    assert [module_key(m) for m in registry.modules] == [("/lib/a.so", 0), ("/lib/b.so", 7), ("/lib/b.so", 8)]
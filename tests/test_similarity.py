@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from similarity import LSHIndex, MinHasher, estimate_similarity
+
+
+def random_keys(rng, count):
+    return rng.integers(0, 1 << 63, count, dtype=np.uint64)
+
+
+def near_duplicate(rng, keys, kept=0.9):
+    """Keep a share of the keys and replace the others, Jaccard ~ kept / (2 - kept)."""
+    keep = rng.random(len(keys)) < kept
+    return np.concatenate((keys[keep], random_keys(rng, int(np.count_nonzero(~keep)))))
+
+
+@pytest.mark.parametrize("shared", [0, 100, 250, 400])
+def test_minhash_estimates_jaccard_similarity(shared):
+    rng = np.random.default_rng(shared)
+    hasher = MinHasher(num_perm=256)
+    common = random_keys(rng, shared)
+    left = np.concatenate((common, random_keys(rng, 400 - shared)))
+    right = np.concatenate((common, random_keys(rng, 400 - shared)))
+
+    jaccard = shared / (800 - shared)
+    estimate = estimate_similarity(hasher.signature_from_keys(left), hasher.signature_from_keys(right))
+    # four standard errors of a 256 slot signature
+    assert abs(estimate - jaccard) < 4 * 0.5 / np.sqrt(256)
+
+
+def test_lsh_recalls_near_duplicates_among_noise():
+    rng = np.random.default_rng(1)
+    hasher = MinHasher(num_perm=64)
+    index = LSHIndex(num_perm=64, bands=16)
+
+    # half of the near duplicates end up in the sorted bands, the others
+    # are still pending
+    queries = [random_keys(rng, 300) for _ in range(100)]
+    duplicates = [hasher.signature_from_keys(near_duplicate(rng, keys)) for keys in queries]
+    noise = [hasher.signature_from_keys(random_keys(rng, 50)) for _ in range(5000)]
+    index.add_many(["dup%d" % i for i in range(50)], np.array(duplicates[:50]))
+    index.add_many(["noise%d" % i for i in range(4500)], np.array(noise[:4500]))
+    index.add_many(["dup%d" % i for i in range(50, 100)], np.array(duplicates[50:]))
+    index.add_many(["noise%d" % i for i in range(4500, 5000)], np.array(noise[4500:]))
+    assert index._indexed == 4550
+
+    # a similarity of ~0.82 is a candidate with probability 1 - (1 - 0.82^4)^16
+    found = 0
+    for i, keys in enumerate(queries):
+        results = index.query(hasher.signature_from_keys(keys), k=3)
+        found += bool(results) and results[0][0] == "dup%d" % i
+        # unrelated traces almost never share a band
+        assert len(results) <= 2
+    assert found >= 97
+
+
+def test_identical_signature_ranks_first():
+    rng = np.random.default_rng(2)
+    hasher = MinHasher(num_perm=32)
+    index = LSHIndex(num_perm=32, bands=8)
+    keys = random_keys(rng, 100)
+    index.add("near", hasher.signature_from_keys(near_duplicate(rng, keys, kept=0.95)))
+    index.add("same", hasher.signature_from_keys(keys))
+
+    assert index.query(hasher.signature_from_keys(keys), k=1) == [("same", 1.0)]
+    assert index.query(hasher.signature_from_keys(random_keys(rng, 100))) == []
@@ -0,0 +1,86 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from coverage_set import ModuleCoverage
+from store import CoverageStore, _decode_low, _encode_low, _merge_chunks
+
+
+def test_reingesting_a_path_keeps_the_other_runs(tmp_path, drcov_log):
+    first = drcov_log("first.drcov", [(0x10, 4, 0), (0x20, 4, 1)])
+    second = drcov_log("second.drcov", [(0x30, 4, 0)])
+    third = drcov_log("third.drcov", [(0x40, 4, 2)])
+
+    with CoverageStore(str(tmp_path / "coverage.db")) as store:
+        store.add_logs([first, second], max_workers=0)
+        store.add_logs([third, first], max_workers=0)
+
+        assert store.run_names() == [first, second, third]
+        assert store.skipped == [first]
+        assert store.runs_covering("/usr/lib/lib0.so", 0x10) == [first]
+
+
+def test_duplicates_within_a_batch_are_skipped(tmp_path, drcov_log):
+    log = drcov_log("run.drcov", [(0x10, 4, 0)])
+
+    with CoverageStore(str(tmp_path / "coverage.db")) as store:
+        store.add_logs([log, log], max_workers=0)
+
+        assert store.run_names() == [log]
+        assert store.skipped == [log]
+
+
+def test_failed_batch_stays_pending(tmp_path, drcov_log):
+    log = drcov_log("run.drcov", [(0x10, 4, 0)])
+    store = CoverageStore(str(tmp_path / "coverage.db"))
+    store.add_logs([log], max_workers=0)
+
+    # a concurrent writer holds the write lock, so the batch can't commit
+    other = CoverageStore(str(tmp_path / "coverage.db"))
+    other.connection.execute("BEGIN IMMEDIATE")
+    store.connection.execute("PRAGMA busy_timeout = 0")
+    store.add_run("pending", [])
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    other.connection.execute("ROLLBACK")
+    other.close()
+
+    store.flush()
+    assert store.run_names() == [log, "pending"]
+    store.close()
+
+
+def coverage(*offsets):
+    offsets = np.array(offsets, dtype=np.uint32)
+    return ModuleCoverage("/usr/lib/lib0.so", "lib0.so", 0, 0x80000, offsets,
+                          np.ones(len(offsets), dtype=np.uint32), np.full(len(offsets), 4, dtype=np.uint16))
+
+
+def test_runs_covering_merges_postings_across_batches(tmp_path):
+    # 5000 runs cover block 0x10, enough to switch its run id chunk to a
+    # bitmap, and every third run covers block 0x20
+    names = ["run%05d" % index for index in range(5000)]
+    with CoverageStore(str(tmp_path / "coverage.db"), batch_size=700) as store:
+        for index, name in enumerate(names):
+            store.add_run(name, [coverage(0x10, 0x20) if index % 3 == 0 else coverage(0x10)])
+        store.flush()
+
+        assert store.runs_covering("/usr/lib/lib0.so", 0x10) == names
+        assert store.runs_covering("/usr/lib/lib0.so", 0x20) == names[::3]
+        assert store.runs_covering("/usr/lib/lib0.so", 0x30) == []
+
+
+@pytest.mark.parametrize("first, second", [
+    (range(0, 10), range(10, 20)),
+    (range(10, 20), range(0, 15)),
+    (range(0, 6000, 2), range(1, 6000, 2)),
+    (range(0, 3000), range(2000, 5000)),
+    (range(0, 65536, 7), range(3, 100)),
+])
+def test_merge_chunks_is_the_union(first, second):
+    first, second = np.array(first), np.array(second)
+    merged = _merge_chunks(_encode_low(first), _encode_low(second))
+
+    assert np.array_equal(_decode_low(merged), np.union1d(first, second))
+    assert merged == _encode_low(np.union1d(first, second))
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import drcov
+from conftest import drcov_header
+from drcov import DRCOV_BB_DTYPE, DrcovParser, _parse_bb_text_fixed, _parse_bb_text_variable
+
+
+BLOCKS = [(0x1000, 3, 0), (0x2040, 17, 1), (0x30, 250, 2)]
+
+# lines drcov would never write, which the BB_TEXT_ENTRY regex rejects
+MALFORMED = [
+    b"module[  0]: 0x0000000000001000,   3 \n",  # trailing space
+    b"module[  0]: 0x0000000000001000,  1 3\n",  # space between digits
+    b"module[  0]+ 9x0000000000001000,   3\n",  # broken ']: 0x' separator
+    b"module[ 0 ]: 0x0000000000001000,   3\n",  # space after the module id
+    b"module[  0]: 0x00000000 0001000,   3\n",  # space inside the offset
+    b"modulE[  0]: 0x0000000000001000,   3\n",  # wrong prefix
+    b"module[  0]: 0x0000000000001000;   3\n",  # wrong comma
+]
+
+
+def text_lines(blocks):
+    return [b"module[%3u]: 0x%016x, %3u\n" % (mod_id, offset, size) for offset, size, mod_id in blocks]
+
+
+def parse_table(lines):
+    data = np.frombuffer(b"".join(lines), dtype=np.uint8)
+    table = np.zeros(len(lines), dtype=DRCOV_BB_DTYPE)
+    return data, table
+
+
+def as_tuples(table):
+    return [(int(bb["offset"]), int(bb["size"]), int(bb["mod_id"])) for bb in table]
+
+
+def test_fixed_width_table():
+    data, table = parse_table(text_lines(BLOCKS))
+    assert _parse_bb_text_fixed(data, table) == len(data)
+    assert as_tuples(table) == BLOCKS
+
+
+def test_variable_width_table():
+    lines = text_lines(BLOCKS)
+    lines[1] = b"module[1]: 0x2040, 17\r\n"
+    data, table = parse_table(lines)
+    assert _parse_bb_text_fixed(data, table) is None
+    assert _parse_bb_text_variable(data, table) == len(data)
+    assert as_tuples(table) == BLOCKS
+
+
+@pytest.mark.parametrize("line", MALFORMED)
+def test_fixed_width_path_rejects_malformed_lines(line):
+    lines = text_lines(BLOCKS)
+    lines[1] = line
+    data, table = parse_table(lines)
+    if len(line) == len(lines[0]):
+        # equally long lines must either be rejected, or left to the variable path
+        try:
+            assert _parse_bb_text_fixed(data, table) is None
+        except ValueError:
+            return
+    with pytest.raises(ValueError):
+        _parse_bb_text_variable(data, table)
+
+
+@pytest.mark.parametrize("line", MALFORMED)
+def test_variable_width_path_rejects_malformed_lines(line):
+    lines = text_lines(BLOCKS)
+    lines[0] = b"module[0]: 0x1000, 3\n"
+    lines[1] = line
+    data, table = parse_table(lines)
+    with pytest.raises(ValueError):
+        _parse_bb_text_variable(data, table)
+
+
+@pytest.mark.parametrize("line", MALFORMED)
+def test_parser_rejects_malformed_lines(line):
+    lines = text_lines(BLOCKS)
+    lines[2] = line
+    with pytest.raises(ValueError):
+        DrcovParser(data=drcov_header(len(lines), text=True) + b"".join(lines))
+
+
+def chunked_blocks(count):
+    return [(0x10 * index, index % 300, index % 3) for index in range(count)]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # a few lines per chunk, so the tables below are split many times
+    monkeypatch.setattr(drcov, "BB_TEXT_CHUNK_SIZE", 100)
+
+
+@pytest.mark.parametrize("variable", [False, True])
+@pytest.mark.parametrize("trailing_newline", [False, True])
+def test_chunked_table_matches_the_blocks(small_chunks, variable, trailing_newline):
+    blocks = chunked_blocks(500)
+    lines = text_lines(blocks)
+    if variable:
+        # every seventh line is shorter, so chunks get differing line counts
+        lines[::7] = [b"module[%u]: 0x%x, %u\n" % (mod_id, offset, size) for offset, size, mod_id in blocks[::7]]
+    if not trailing_newline:
+        lines[-1] = lines[-1].rstrip(b"\n")
+
+    for workers in (1, 3, 8):
+        parser = DrcovParser(data=drcov_header(len(blocks), text=True) + b"".join(lines), workers=workers)
+        assert as_tuples(parser.bb_table) == blocks
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_truncated_chunked_table_reports_table_counts(small_chunks, workers):
+    lines = text_lines(chunked_blocks(500))[:420]
+    with pytest.raises(ValueError, match="expected 500 entries, found 420"):
+        DrcovParser(data=drcov_header(500, text=True) + b"".join(lines), workers=workers)
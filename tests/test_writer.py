@@ -0,0 +1,26 @@
+import pytest
+
+import drcov
+import writer
+from drcov import DrcovParser
+from writer import DrcovWriter
+
+
+BLOCKS = [(0x1000, 3, 0), (0x2040, 17, 1), (0x1000, 3, 0), (0x30, 250, 2)]
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_from_parser_without_numpy(drcov_log, monkeypatch, binary):
+    path = drcov_log("a.drcov", BLOCKS)
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    monkeypatch.setattr(drcov, "np", None)
+    monkeypatch.setattr(writer, "np", None)
+
+    parser = DrcovParser(path)
+    assert DrcovWriter.from_parser(parser).to_bytes() == raw
+
+    converted = DrcovParser(data=DrcovWriter.from_parser(parser, binary=binary).to_bytes(dedup=True))
+    assert [(bb.offset, bb.size, bb.mod_id) for bb in converted._raw_basic_blocks] == \
+        [BLOCKS[0], BLOCKS[1], BLOCKS[3]]
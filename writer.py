@@ -0,0 +1,235 @@
+"""
+drcov log writer.
+
+Serializes a module table and a basic block table back into the drcov log
+format, so merged or minimized coverage can be loaded by Lighthouse and
+other drcov consumers. Logs written from a parsed DrcovParser round-trip
+byte-for-byte.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+from typing import Any, List, Optional
+
+from drcov import DRCOV_BB_DTYPE, DrcovBasicBlock, _Uncompressed, np, zstd
+
+
+# module table columns, as written by DynamoRIO for each table version
+MODULE_TABLE_COLUMNS = {
+    2: ["id", "base", "end", "entry", "path"],
+    3: ["id", "containing_id", "start", "end", "entry", "path"],
+    4: ["id", "containing_id", "start", "end", "entry", "offset", "path"],
+}
+WINDOWS_COLUMNS = ["checksum", "timestamp"]  # inserted right before 'path'
+
+
+class DrcovWriter(object):
+    """
+    Writer emitting drcov logs from a module table and columnar block arrays.
+
+    Blocks are given as parallel offset, size and module id arrays (or a
+    DRCOV_BB_DTYPE table), and are packed into the on-disk layout before
+    being written out with a single write.
+    """
+
+    def __init__(self, modules: List[Any], offsets, sizes, mod_ids, module_table_version: int = 2,
+                 flavor: str = "drcov", binary: bool = True, windows: Optional[bool] = None,
+                 address_width: Optional[int] = None):
+        """
+        Args:
+            modules: Module table entries (DrcovModule or ParsedModule objects)
+            offsets: Module relative block offsets
+            sizes: Block sizes
+            mod_ids: Module ids of the blocks
+            module_table_version: Module table layout, 2, 3 or 4
+            flavor: Value of the 'DRCOV FLAVOR' header
+            binary: Write a binary rather than an ascii basic block table
+            windows: Write the checksum and timestamp columns (default: only
+                if any module has a checksum or timestamp)
+            address_width: Hex digits of addresses (default: taken from the
+                modules, else 16)
+        """
+        if module_table_version not in MODULE_TABLE_COLUMNS:
+            raise ValueError("Unsupported module table version %s" % module_table_version)
+        if not len(offsets) == len(sizes) == len(mod_ids):
+            raise ValueError("Block offset, size and module id arrays differ in length")
+
+        if windows is None:
+            windows = any(module.checksum or module.timestamp for module in modules)
+        if address_width is None:
+            address_width = getattr(modules[0], "address_width", 16) if modules else 16
+
+        self.modules = modules
+        self.offsets = offsets
+        self.sizes = sizes
+        self.mod_ids = mod_ids
+        self.module_table_version = module_table_version
+        self.flavor = flavor
+        self.binary = binary
+        self.windows = windows
+        self.address_width = address_width
+
+    @classmethod
+    def from_parser(cls, parser, **kwargs) -> "DrcovWriter":
+        """
+        Create a writer reproducing a parsed log.
+
+        Keyword arguments override the layout taken from the parser.
+        """
+        layout = {
+            "module_table_version": parser.module_table_version,
+            "flavor": parser.flavor.strip().decode("latin-1"),
+            "binary": parser.bb_table_is_binary,
+            "windows": "checksum" in parser.module_table_columns,
+        }
+        layout.update(kwargs)
+        if np is None:
+            # the columnar accessors need NumPy, read the ctypes blocks instead
+            blocks = parser._raw_basic_blocks
+            return cls(parser._raw_modules, [bb.offset for bb in blocks], [bb.size for bb in blocks],
+                       [bb.mod_id for bb in blocks], **layout)
+        return cls(parser._raw_modules, parser.offsets, parser.sizes, parser.mod_ids, **layout)
+
+    @classmethod
+    def from_table(cls, modules: List[Any], table, **kwargs) -> "DrcovWriter":
+        """Create a writer from a DRCOV_BB_DTYPE structured block table."""
+        return cls(modules, table["offset"], table["size"], table["mod_id"], **kwargs)
+
+    # --------------------------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------------------------
+
+    def write(self, file, dedup: bool = False, compression: Optional[str] = None) -> None:
+        """
+        Write the drcov log.
+
+        Args:
+            file: Path or binary file object to write to
+            dedup: Only write the first occurrence of every (module, offset)
+            compression: 'gzip', 'bz2', 'xz' or 'zstd' to compress the log
+        """
+        if isinstance(file, (str, bytes, os.PathLike)):
+            with open(file, "wb") as f:
+                self.write(f, dedup, compression)
+            return
+
+        blocks = self._pack_blocks(dedup)
+        with _open_compressed(file, compression) as f:
+            f.write(self._format_header(len(blocks)))
+            if self.binary:
+                f.write(memoryview(blocks).cast("B"))
+            else:
+                f.write(self._format_text_blocks(blocks))
+
+    def to_bytes(self, dedup: bool = False, compression: Optional[str] = None) -> bytes:
+        """Return the drcov log as bytes."""
+        f = io.BytesIO()
+        self.write(f, dedup, compression)
+        return f.getvalue()
+
+    # --------------------------------------------------------------------------
+    # Formatting - Internals
+    # --------------------------------------------------------------------------
+
+    def _format_header(self, block_count: int) -> bytes:
+        """Format everything up to (and including) the BB table header."""
+        columns = list(MODULE_TABLE_COLUMNS[self.module_table_version])
+        if self.windows:
+            columns[-1:-1] = WINDOWS_COLUMNS
+
+        lines = [
+            "DRCOV VERSION: 2",
+            "DRCOV FLAVOR: %s" % self.flavor,
+            "Module Table: version %u, count %u" % (self.module_table_version, len(self.modules)),
+            "Columns: %s" % ", ".join(columns),
+        ]
+        lines.extend(self._format_module(module) for module in self.modules)
+        lines.append("BB Table: %u bbs" % block_count)
+        if not self.binary:
+            lines.append("module id, start, size:")
+        return ("\n".join(lines) + "\n").encode()
+
+    def _format_module(self, module) -> str:
+        """Format a module table entry, the way DynamoRIO prints it."""
+        def address(value, width=self.address_width):
+            return "0x%0*x" % (width, value)
+
+        fields = ["%3u" % module.id]
+        if self.module_table_version >= 3:
+            fields.append("%3u" % getattr(module, "containing_id", module.id))
+        fields += [address(module.base), address(module.end), address(module.entry)]
+        if self.module_table_version == 4:
+            fields.append(address(getattr(module, "offset", 0), 16))
+        if self.windows:
+            fields += ["0x%08x" % module.checksum, "0x%08x" % module.timestamp]
+        fields.append(module.path)
+        return ", ".join(fields)
+
+    def _format_text_blocks(self, blocks) -> bytes:
+        """Format the entries of an ascii basic block table."""
+        line = "module[%%3u]: 0x%%0%ux, %%3u\n" % self.address_width
+        if np is not None:
+            entries = zip(blocks["mod_id"].tolist(), blocks["offset"].tolist(), blocks["size"].tolist())
+        else:
+            entries = ((bb.mod_id, bb.offset, bb.size) for bb in blocks)
+        return "".join([line % entry for entry in entries]).encode()
+
+    def _pack_blocks(self, dedup: bool):
+        """Pack the block columns into the on-disk basic block layout."""
+        if np is None:
+            return self._pack_blocks_slow(dedup)
+
+        blocks = np.empty(len(self.offsets), dtype=DRCOV_BB_DTYPE)
+        blocks["offset"] = self.offsets
+        blocks["size"] = self.sizes
+        blocks["mod_id"] = self.mod_ids
+
+        if dedup and len(blocks):
+            # keep the first occurrence of each block, in the original order
+            keys = (blocks["mod_id"].astype(np.uint64) << np.uint64(32)) | blocks["offset"]
+            _, first = np.unique(keys, return_index=True)
+            blocks = blocks[np.sort(first)]
+        return blocks
+
+    def _pack_blocks_slow(self, dedup: bool):
+        """Pure Python version of _pack_blocks()."""
+        entries = list(zip(self.offsets, self.sizes, self.mod_ids))
+        if dedup:
+            seen, unique = set(), []
+            for offset, size, mod_id in entries:
+                if (mod_id, offset) not in seen:
+                    seen.add((mod_id, offset))
+                    unique.append((offset, size, mod_id))
+            entries = unique
+
+        blocks = (DrcovBasicBlock * len(entries))()
+        for bb, (offset, size, mod_id) in zip(blocks, entries):
+            bb.offset, bb.size, bb.mod_id = offset, size, mod_id
+        return blocks
+
+
+# ------------------------------------------------------------------------------
+# Compression Helpers
+# ------------------------------------------------------------------------------
+
+def _open_compressed(f, compression):
+    """Wrap a binary file object in a compressing writer, if requested."""
+    if compression is None:
+        return _Uncompressed(f)
+    if compression == "gzip":
+        # fixed mtime, so equal logs compress to equal bytes
+        return gzip.GzipFile(fileobj=f, mode="wb", mtime=0)
+    if compression == "bz2":
+        return bz2.BZ2File(f, mode="wb")
+    if compression == "xz":
+        return lzma.LZMAFile(f, mode="wb")
+    if compression == "zstd":
+        if zstd is None:
+            raise ValueError("zstd compression requested, but no zstd module is available")
+        if hasattr(zstd, "ZstdFile"):
+            return zstd.ZstdFile(f, mode="wb")
+        return zstd.ZstdCompressor().stream_writer(f, closefd=False)
+    raise ValueError("Unknown compression '%s'" % compression)